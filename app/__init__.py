@@ -1,88 +1,60 @@
 # app/__init__.py
+"""
+Paquete de la aplicación.
 
-# Importar las funciones y módulos principales
-from .core.config import settings
-from .core.database import get_db, Base, engine
-from .exceptions import setup_exception_handlers
-
-# Exportar componentes importantes
-__all__ = [
-    "settings",
-    "get_db",
-    "Base",
-    "engine",
-    "setup_exception_handlers"
-]
+Los componentes principales se importan bajo demanda (PEP 562): importar `app` o un
+submódulo ligero (p. ej. `app.core.migrations`) no carga la configuración, no crea el
+engine ni importa el resto de la aplicación.
+"""
+from importlib import import_module
+from typing import Any
 
 # Versión de la aplicación
 __version__ = "1.0.0"
 
-# Información sobre la aplicación
-APP_NAME = settings.PROJECT_NAME
-API_V1_STR = settings.API_V1_STR
+# Componentes importantes y el módulo que los define
+_EXPORTS = {
+    "settings": ".core.config",
+    "get_db": ".core.database",
+    "Base": ".core.database",
+    "engine": ".core.database",
+    "setup_exception_handlers": ".exceptions",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    if name in _EXPORTS:
+        return getattr(import_module(_EXPORTS[name], __name__), name)
+    # Información sobre la aplicación
+    if name == "APP_NAME":
+        return __getattr__("settings").PROJECT_NAME
+    if name == "API_V1_STR":
+        return __getattr__("settings").API_V1_STR
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # Configurar rutas de las aplicaciones
 def get_app_routes():
     """Obtener todas las rutas de la aplicación."""
+    api_v1_str = __getattr__("API_V1_STR")
     return {
-        "auth": f"{API_V1_STR}/auth",
-        "usuarios": f"{API_V1_STR}/usuarios",
-        "categorias": f"{API_V1_STR}/categorias",
-        "productos": f"{API_V1_STR}/productos"
+        "auth": f"{api_v1_str}/auth",
+        "registros": f"{api_v1_str}/registros",
+        "monitoreo": f"{api_v1_str}/monitoreo",
+        "graphql": "/graphql",
     }
 
 
 # Esta función puede ser llamada desde scripts externos
 def create_app():
     """Crear y configurar la aplicación FastAPI."""
-    from fastapi import FastAPI
-    from fastapi.middleware.cors import CORSMiddleware
-    from .routers import auth, usuarios, categorias, productos
-    from .exceptions import setup_exception_handlers
-
-    app = FastAPI(
-        title=settings.PROJECT_NAME,
-        version=__version__,
-        description="API para gestión de productos y categorías con autenticación segura.",
-        docs_url="/docs",
-        redoc_url="/redoc",
-    )
-
-    # Configuración de CORS
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=[str(origin) for origin in settings.BACKEND_CORS_ORIGINS],
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
-    )
-
-    # Configurar manejadores de excepciones
-    setup_exception_handlers(app, debug=settings.DEBUG)
-
-    # Incluir routers
-    app.include_router(auth.router)
-    app.include_router(usuarios.router)
-    app.include_router(categorias.router)
-    app.include_router(productos.router)
-
+    from .main import app
     return app
 
 
-# Inicialización automática de tablas al importar el módulo
 def init_db():
-    """Inicializar la base de datos si es necesario."""
-    try:
-        Base.metadata.create_all(bind=engine)
-        print("Base de datos inicializada correctamente.")
-    except Exception as e:
-        print(f"Error al inicializar la base de datos: {e}")
-
-
-# Esto permite un patrón común en Python donde app/__init__.py
-# realiza alguna configuración automática al importar el paquete
-if settings.DEBUG:
-    print(f"Iniciando aplicación {APP_NAME} en modo DEBUG")
-    print(f"Versión de la API: {__version__}")
-    print(f"Rutas disponibles: {get_app_routes()}")
\ No newline at end of file
+    """Crear las tablas y aplicar las migraciones pendientes (ver app.core.migrations)."""
+    from .core.migrations import upgrade
+    upgrade()
@@ -1,4 +1,19 @@
-from .config import settings
-from .database import Base, engine, get_db
+from importlib import import_module
+from typing import Any
 
-__all__ = ["settings", "Base", "engine", "get_db"]
\ No newline at end of file
+# Importación bajo demanda (ver app/__init__.py): `app.core.migrations` o
+# `app.core.config` no deben crear el engine al importarse
+_EXPORTS = {
+    "settings": ".config",
+    "Base": ".database",
+    "engine": ".database",
+    "get_db": ".database",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    if name in _EXPORTS:
+        return getattr(import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,11 +1,51 @@
+from pydantic import Field
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
+from functools import cached_property
 from typing import Optional, Dict, Any, List
+import logging
 import os
+import tempfile
+
+logger = logging.getLogger(__name__)
 
 # Cargar variables de entorno
 load_dotenv()
 
+# Drivers ODBC para SQL Server, en orden de preferencia
+ODBC_DRIVERS = [
+    "ODBC Driver 18 for SQL Server",
+    "ODBC Driver 17 for SQL Server",
+    "SQL Server Native Client 11.0",
+    "SQL Server",
+    "FreeTDS"
+]
+ODBC_DRIVER_POR_DEFECTO = "ODBC Driver 17 for SQL Server"
+
+
+def detectar_driver_odbc() -> str:
+    """Driver ODBC instalado que se usará para SQL Server (consulta a pyodbc)."""
+    try:
+        import pyodbc
+        available_drivers = pyodbc.drivers()
+    except ImportError:
+        logger.warning("No se pudo detectar drivers ODBC. Usando '%s' por defecto", ODBC_DRIVER_POR_DEFECTO)
+        return ODBC_DRIVER_POR_DEFECTO
+
+    # Buscar el primer driver disponible de nuestra lista preferida
+    for driver in ODBC_DRIVERS:
+        if driver in available_drivers:
+            logger.info("Usando driver ODBC: '%s'", driver)
+            return driver
+
+    # Si no encontramos ninguno en nuestra lista preferida, usar el primero disponible
+    if available_drivers:
+        logger.info("Usando driver ODBC: '%s'", available_drivers[0])
+        return available_drivers[0]
+
+    logger.warning("No se detectó un driver ODBC. Usando '%s' por defecto", ODBC_DRIVER_POR_DEFECTO)
+    return ODBC_DRIVER_POR_DEFECTO
+
 
 class Settings(BaseSettings):
     # API
@@ -20,13 +60,106 @@ class Settings(BaseSettings):
     DB_PASSWORD: Optional[str] = None
     DB_NAME: str
     DB_TRUSTED_CONNECTION: bool = False
+    # URI explícita (p. ej. SQLite en pruebas); si no se define se construye con
+    # `database_uri` al crear el engine
     SQLALCHEMY_DATABASE_URI: Optional[str] = None
+    # Driver ODBC a usar; si no se define se detecta con pyodbc al construir la URI
+    DB_ODBC_DRIVER: Optional[str] = None
+    # Crear tablas y aplicar migraciones al arrancar cada worker (si no, python -m app.core.migrations)
+    DB_AUTO_MIGRATE: bool = False
+
+    # Pool de conexiones (por worker). En SQLite solo aplican pre-ping y recycle
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE: int = 3600
+    DB_POOL_USE_LIFO: bool = False
+    # Conexiones abiertas al arrancar, antes de atender peticiones (0 = ninguna; máximo DB_POOL_SIZE)
+    DB_POOL_PREWARM: int = 5
+    # Segundos entre pings a las conexiones inactivas del pool (0 = deshabilitado)
+    DB_POOL_KEEPALIVE_INTERVAL: float = 0
+
+    # Modo asíncrono (opcional): usa AsyncEngine en los resolvers GraphQL
+    DB_ASYNC: bool = False
+    SQLALCHEMY_ASYNC_DATABASE_URI: Optional[str] = None
+
+    # Inserciones masivas: pyodbc fast_executemany y filas por transacción (mínimo 1)
+    DB_FAST_EXECUTEMANY: bool = True
+    BULK_CHUNK_SIZE: int = Field(1000, ge=1)
+
+    # Exportación en streaming: filas leídas del cursor por bloque (mínimo 1)
+    EXPORT_CHUNK_SIZE: int = Field(5000, ge=1)
+
+    # Importación en streaming: filas por transacción (mínimo 1) y rechazos detallados en la respuesta
+    IMPORT_BATCH_SIZE: int = Field(5000, ge=1)
+    IMPORT_MAX_REJECTS: int = 1000
 
     # Seguridad
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    # Caché de tokens verificados (las entradas expiran como muy tarde con el `exp` del token)
+    TOKEN_CACHE_SIZE: int = 10000
+    TOKEN_CACHE_NEGATIVE_TTL: float = 10.0
+
+    # Caché de usuarios autenticados (el TTL acota la desactualización entre workers)
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL: float = 60.0
+
+    # Hilos dedicados a bcrypt: los logins que excedan el límite esperan en cola
+    AUTH_HASH_CONCURRENCY: int = 2
+
+    # Escritura diferida de ultimo_login: cada cuántos segundos o usuarios se vuelca
+    LOGIN_FLUSH_INTERVAL: float = 5.0
+    LOGIN_FLUSH_MAX: int = 500
+
+    # GraphQL: Automatic Persisted Queries
+    APQ_ENABLED: bool = True
+    APQ_CACHE_SIZE: int = 1000
+    APQ_ALLOWLIST_PATH: Optional[str] = None
+
+    # GraphQL: caché de documentos parseados y validados (0 = deshabilitada)
+    GRAPHQL_DOCUMENT_CACHE_SIZE: int = 500
+
+    # GraphQL: límites de costo, profundidad y alias por operación
+    GRAPHQL_MAX_COST: int = 20000
+    GRAPHQL_MAX_DEPTH: int = 8
+    GRAPHQL_MAX_ALIASES: int = 100
+
+    # Estadísticas de SQL por operación GraphQL: detalle en extensions.sqlStats,
+    # repeticiones de una misma sentencia que indican N+1 y presupuesto de
+    # sentencias por operación (0 = sin límite; warn registra, error falla la operación)
+    SQL_STATS_IN_RESPONSE: bool = DEBUG
+    SQL_N_PLUS_ONE_THRESHOLD: int = 5
+    SQL_QUERY_BUDGET: int = 0
+    SQL_QUERY_BUDGET_MODE: str = "warn"
+
+    # Log de sentencias lentas, con rotación por tamaño. Deshabilitado por defecto (ruta
+    # vacía); conviene una ruta absoluta: una relativa depende del directorio de trabajo
+    SLOW_QUERY_LOG_PATH: str = ""
+    SLOW_QUERY_THRESHOLD_MS: float = 500.0
+    SLOW_QUERY_SAMPLE_RATE: float = 1.0
+    SLOW_QUERY_EXPLAIN: bool = False
+    SLOW_QUERY_LOG_MAX_BYTES: int = 10 * 1024 * 1024
+    SLOW_QUERY_LOG_BACKUPS: int = 5
+
+    # Nombres de operación GraphQL usados como etiqueta en /metrics, además de los de la
+    # allowlist de APQ; el resto se agrupa como "other"
+    METRICS_OPERATION_NAMES: List[str] = []
+
+    # Cabecera Server-Timing con el desglose por fases de cada petición
+    SERVER_TIMING_ENABLED: bool = True
+
+    # Rate limiting compartido entre workers (archivo SQLite local o memory://)
+    RATE_LIMIT_STORAGE_URI: str = "sqlite:///" + os.path.join(tempfile.gettempdir(), "fastapi_rate_limit.db")
+    # Claves vigentes como máximo; con la tabla llena los clientes nuevos se admiten sin
+    # limitar (fail open, con aviso) y los contadores existentes se conservan
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    # Unidades de costo GraphQL por cliente (vacío = sin límite)
+    GRAPHQL_RATE_LIMIT: Optional[str] = "200000/minute"
+
     # CORS
     BACKEND_CORS_ORIGINS: List[str] = ["*"]
 
@@ -34,66 +167,43 @@ class Settings(BaseSettings):
     DEFAULT_LIMIT: int = 100
     MAX_LIMIT: int = 1000
 
+    # Conteo del total en listados: exact | approximate | cached
+    COUNT_STRATEGY: str = "exact"
+    COUNT_CACHE_TTL: float = 30.0
+
     class Config:
         env_file = ".env"
 
-    def __init__(self, **values: Any):
-        super().__init__(**values)
-
-        # Lista de posibles drivers ODBC para SQL Server
-        odbc_drivers = [
-            "ODBC Driver 18 for SQL Server",
-            "ODBC Driver 17 for SQL Server",
-            "SQL Server Native Client 11.0",
-            "SQL Server",
-            "FreeTDS"
-        ]
-
-        # Intentar detectar el driver disponible
-        driver_encontrado = None
-        try:
-            import pyodbc
-            available_drivers = pyodbc.drivers()
-
-            # Buscar el primer driver disponible de nuestra lista preferida
-            for driver in odbc_drivers:
-                if driver in available_drivers:
-                    driver_encontrado = driver
-                    break
-
-            # Si no encontramos ninguno en nuestra lista preferida, usar el primero disponible
-            if not driver_encontrado and available_drivers:
-                driver_encontrado = available_drivers[0]
-
-            if driver_encontrado:
-                print(f"INFO: Usando driver ODBC: '{driver_encontrado}'")
-            else:
-                # Si no hay drivers disponibles, usar uno común como fallback
-                driver_encontrado = "ODBC Driver 17 for SQL Server"
-                print(f"ADVERTENCIA: No se detectó un driver ODBC. Usando '{driver_encontrado}' por defecto")
-
-        except ImportError:
-            # Si pyodbc no está disponible por alguna razón
-            driver_encontrado = "ODBC Driver 17 for SQL Server"
-            print(f"ADVERTENCIA: No se pudo detectar drivers ODBC. Usando '{driver_encontrado}' por defecto")
+    @cached_property
+    def database_uri(self) -> str:
+        """
+        URI de conexión a la base de datos.
+
+        Se calcula la primera vez que se usa (al crear el engine), de modo que cargar la
+        configuración no consulta a pyodbc; la URI explícita se respeta tal cual.
+        """
+        if self.SQLALCHEMY_DATABASE_URI:
+            return self.SQLALCHEMY_DATABASE_URI
+
+        driver_encontrado = self.DB_ODBC_DRIVER or detectar_driver_odbc()
 
         # Construir la URI de conexión a la base de datos con parámetros adicionales de seguridad
         driver_param = driver_encontrado.replace(' ', '+')
 
         if self.DB_TRUSTED_CONNECTION:
-            self.SQLALCHEMY_DATABASE_URI = (
+            return (
                 f"mssql+pyodbc://{self.DB_HOST}/{self.DB_NAME}"
                 f"?driver={driver_param}&trusted_connection=yes&TrustServerCertificate=yes"
             )
-        else:
-            # Asegurar que se escape correctamente la contraseña para URL
-            import urllib.parse
-            password_escaped = urllib.parse.quote_plus(self.DB_PASSWORD or "")
-
-            self.SQLALCHEMY_DATABASE_URI = (
-                f"mssql+pyodbc://{self.DB_USER}:{password_escaped}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
-                f"?driver={driver_param}&TrustServerCertificate=yes"
-            )
+
+        # Asegurar que se escape correctamente la contraseña para URL
+        import urllib.parse
+        password_escaped = urllib.parse.quote_plus(self.DB_PASSWORD or "")
+
+        return (
+            f"mssql+pyodbc://{self.DB_USER}:{password_escaped}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
+            f"?driver={driver_param}&TrustServerCertificate=yes"
+        )
 
 
 settings = Settings()
\ No newline at end of file
@@ -1,27 +1,75 @@
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional, TypeVar
 from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool
+from . import metrics, server_timing, slow_query, sql_stats
 from .config import settings
+from .pool import instrument_pool, pool_options
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Drivers asíncronos equivalentes para cada backend soportado
+ASYNC_DRIVERS = {
+    "mssql": "aioodbc",
+    "sqlite": "aiosqlite",
+    "postgresql": "asyncpg",
+}
 
 # Crear el motor de base de datos con configuraciones específicas para SQL Server
 engine = create_engine(
-    settings.SQLALCHEMY_DATABASE_URI,
-    pool_pre_ping=True,
-    pool_recycle=3600,
+    settings.database_uri,
     echo=settings.DEBUG,
+    **pool_options(settings.database_uri),
     # Configuraciones específicas para SQL Server
-    connect_args={
-        "autocommit": False,
-    }
+    **({
+        "connect_args": {"autocommit": False},
+        # Envía los executemany como un único lote de parámetros (inserciones masivas)
+        "fast_executemany": settings.DB_FAST_EXECUTEMANY,
+    } if settings.database_uri.startswith("mssql+pyodbc") else {})
 )
+instrument_pool(engine.pool)
 
 # Crear la sesión
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
 # Base para los modelos
 Base = declarative_base()
 
+
+def get_async_database_uri(uri: str) -> str:
+    """Obtiene la URI asíncrona equivalente a una URI síncrona."""
+    url = make_url(uri)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No hay un driver asíncrono configurado para '{backend}'")
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+
+# Motor asíncrono opcional (DB_ASYNC=True)
+async_engine = None
+AsyncSessionLocal = None
+
+if settings.DB_ASYNC:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    async_uri = settings.SQLALCHEMY_ASYNC_DATABASE_URI or get_async_database_uri(settings.database_uri)
+    async_engine = create_async_engine(
+        async_uri,
+        echo=settings.DEBUG,
+        **pool_options(async_uri, asincrono=True),
+    )
+    instrument_pool(async_engine.sync_engine.pool)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
 # Función para obtener la sesión de la BD
 def get_db():
     db = SessionLocal()
@@ -30,18 +78,127 @@ def get_db():
     finally:
         db.close()
 
+
+async def get_async_db():
+    """Obtener una sesión asíncrona (solo disponible con DB_ASYNC=True)"""
+    if AsyncSessionLocal is None:
+        raise RuntimeError("El modo asíncrono no está habilitado (DB_ASYNC=False)")
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def _run_with_session(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    db = SessionLocal()
+    try:
+        return fn(db, *args, **kwargs)
+    finally:
+        db.close()
+
+
+async def run_db(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Ejecuta fn(db, *args, **kwargs) sin bloquear el event loop.
+
+    Con DB_ASYNC=True la función recibe la sesión síncrona de un AsyncSession
+    (run_sync), por lo que la E/S se realiza de forma asíncrona. En caso contrario
+    se ejecuta con una sesión normal dentro del threadpool.
+    """
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(_run_with_session, fn, *args, **kwargs)
+
+
 # Evento para establecer configuraciones específicas para SQL Server
 @event.listens_for(Engine, "connect")
 def set_mssql_options(dbapi_connection, connection_record):
     """Configurar opciones específicas de SQL Server"""
+    if not _is_mssql_connection(dbapi_connection):
+        return
     cursor = dbapi_connection.cursor()
-    # Estas configuraciones ayudan con el problema de rowcount
-    cursor.execute("SET NOCOUNT OFF")  # Cambiar a OFF para obtener el conteo correcto
-    cursor.execute("SET IMPLICIT_TRANSACTIONS OFF")
+    # Estas configuraciones ayudan con el problema de rowcount (NOCOUNT OFF para
+    # obtener el conteo correcto). Se envían en un único lote: un viaje al servidor
+    cursor.execute("SET NOCOUNT OFF; SET IMPLICIT_TRANSACTIONS OFF")
     cursor.close()
 
+
+def _is_mssql_connection(dbapi_connection) -> bool:
+    """Indica si la conexión DBAPI pertenece a SQL Server (pyodbc/aioodbc)"""
+    return "odbc" in type(dbapi_connection).__module__.lower()
+
+
+@dataclass
+class SentenciaEjecutada:
+    """Sentencia SQL ejecutada (o fallida), medida una sola vez para todos los suscriptores."""
+    conn: Any
+    statement: Optional[str]
+    parameters: Any
+    executemany: bool
+    duracion: float
+    error: Optional[BaseException] = None
+
+
+# Reciben cada sentencia ejecutada por cualquier Engine (ver suscribir_sentencias)
+_suscriptores: List[Callable[[SentenciaEjecutada], None]] = []
+
+
+def suscribir_sentencias(fn: Callable[[SentenciaEjecutada], None]) -> Callable[[SentenciaEjecutada], None]:
+    """Registra `fn` para recibir cada SentenciaEjecutada."""
+    _suscriptores.append(fn)
+    return fn
+
+
+def _notificar(sentencia: SentenciaEjecutada) -> None:
+    for fn in _suscriptores:
+        try:
+            fn(sentencia)
+        except Exception:
+            # La instrumentación nunca debe hacer fallar la sentencia
+            logger.exception("Error en el suscriptor de sentencias %s", getattr(fn, "__qualname__", fn))
+
+
+# Un único par de listeners mide todas las sentencias; la pila por conexión admite
+# sentencias anidadas (p. ej. listeners que ejecutan SQL durante otra sentencia)
+@event.listens_for(Engine, "before_cursor_execute")
+def _inicio_sentencia(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("sentencia_inicio", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _fin_sentencia(conn, cursor, statement, parameters, context, executemany):
+    inicios = conn.info.get("sentencia_inicio")
+    if inicios:
+        duracion = time.perf_counter() - inicios.pop()
+        _notificar(SentenciaEjecutada(conn, statement, parameters, executemany, duracion))
+
+
+@event.listens_for(Engine, "handle_error")
+def _error_sentencia(exception_context):
+    conn = exception_context.connection
+    inicios = conn.info.get("sentencia_inicio") if conn is not None else None
+    duracion = time.perf_counter() - inicios.pop() if inicios else 0.0
+    contexto = exception_context.execution_context
+    _notificar(SentenciaEjecutada(
+        conn,
+        exception_context.statement,
+        exception_context.parameters,
+        bool(contexto is not None and contexto.executemany),
+        duracion,
+        exception_context.original_exception
+    ))
+
+
+for _suscriptor in (
+        metrics.registrar_sentencia,
+        sql_stats.registrar_sentencia,
+        server_timing.registrar_sentencia,
+        slow_query.registrar_sentencia,
+):
+    suscribir_sentencias(_suscriptor)
+
+
 # Evento adicional para configurar la sesión
 @event.listens_for(SessionLocal, "before_commit")
 def receive_before_commit(session):
     """Configuraciones antes del commit"""
-    pass
\ No newline at end of file
+    pass
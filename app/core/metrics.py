@@ -0,0 +1,95 @@
+"""
+Métricas en formato Prometheus.
+
+Con varios workers se debe definir PROMETHEUS_MULTIPROC_DIR (un directorio vacío al
+arrancar): cada proceso escribe sus valores en archivos mmap de ese directorio y
+`/metrics` los agrega con MultiProcessCollector.
+"""
+import os
+from typing import Tuple
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+
+# Buckets en segundos, pensados para operaciones de milisegundos a pocos segundos
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+GRAPHQL_OPERATIONS = Counter(
+    "graphql_operations_total",
+    "Operaciones GraphQL ejecutadas",
+    ["operation", "type"]
+)
+GRAPHQL_OPERATION_DURATION = Histogram(
+    "graphql_operation_duration_seconds",
+    "Duración de las operaciones GraphQL (parse, validación y ejecución)",
+    ["operation", "type"],
+    buckets=BUCKETS
+)
+GRAPHQL_RESOLVER_DURATION = Histogram(
+    "graphql_resolver_duration_seconds",
+    "Duración de los resolvers raíz de Query y Mutation",
+    ["field"],
+    buckets=BUCKETS
+)
+GRAPHQL_RESULTS = Counter(
+    "graphql_results_total",
+    "Resultado de los resolvers raíz según el campo `success` de la respuesta",
+    ["field", "success"]
+)
+GRAPHQL_ERRORS = Counter(
+    "graphql_errors_total",
+    "Errores GraphQL devueltos, por tipo",
+    ["type"]
+)
+GRAPHQL_CACHE_LOOKUPS = Counter(
+    "graphql_cache_lookups_total",
+    "Búsquedas en la caché de documentos (`document`) y en la de APQ por hash (`apq`)",
+    ["cache", "result"]
+)
+DB_QUERIES = Counter(
+    "db_queries_total",
+    "Sentencias SQL ejecutadas, por tipo de sentencia",
+    ["statement"]
+)
+DB_ERRORS = Counter(
+    "db_errors_total",
+    "Sentencias SQL que terminaron en error, por tipo de excepción",
+    ["type"]
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Duración de las sentencias SQL",
+    ["statement"],
+    buckets=BUCKETS
+)
+
+
+def _tipo_sentencia(statement: str) -> str:
+    palabra = statement.lstrip().split(None, 1)[:1]
+    return palabra[0].upper() if palabra else "OTHER"
+
+
+def registrar_sentencia(sentencia) -> None:
+    """Suscriptor de app.core.database: cuenta y mide cada sentencia, y sus errores."""
+    if sentencia.error is not None:
+        DB_ERRORS.labels(type(sentencia.error).__name__).inc()
+        return
+    tipo = _tipo_sentencia(sentencia.statement)
+    DB_QUERIES.labels(tipo).inc()
+    DB_QUERY_DURATION.labels(tipo).observe(sentencia.duracion)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Devuelve el cuerpo y el content type de `/metrics`."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,107 @@
+"""
+Migraciones del esquema.
+
+`create_all` solo crea las tablas que no existen, por lo que los cambios sobre tablas
+ya creadas (índices, restricciones) se aplican aquí como pasos idempotentes.
+
+Las migraciones deben ejecutarse en cada despliegue, antes de arrancar los workers
+(o con DB_AUTO_MIGRATE=True): el modelo declara restricciones (p. ej. el índice único
+de `documento`) de las que dependen las mutaciones, y sin migrar la base de datos no
+las tendría. Los workers no inspeccionan el esquema al arrancar; `--check` permite
+que el despliegue compruebe que no queda nada pendiente.
+
+Uso:
+    python -m app.core.migrations            # aplica las migraciones pendientes
+    python -m app.core.migrations --check    # termina con código 1 si hay pendientes
+"""
+import logging
+import sys
+from typing import Callable, List, Optional, Tuple
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+
+def _tiene_indice_unico(conn: Connection, tabla: str, columnas: List[str]) -> bool:
+    inspector = inspect(conn)
+    for indice in inspector.get_indexes(tabla):
+        if indice.get("unique") and indice["column_names"] == columnas:
+            return True
+    for restriccion in inspector.get_unique_constraints(tabla):
+        if restriccion["column_names"] == columnas:
+            return True
+    return False
+
+
+def indice_unico_documento_aplicado(conn: Connection) -> bool:
+    from ..models.registro import Registro
+
+    return _tiene_indice_unico(conn, Registro.__table__.name, ["documento"])
+
+
+def indice_unico_documento(conn: Connection) -> None:
+    """Índice único sobre registros.documento (búsquedas por documento y unicidad sin carreras)."""
+    from ..models.registro import Registro
+
+    tabla = Registro.__table__
+    if indice_unico_documento_aplicado(conn):
+        return
+
+    indice = next(ix for ix in tabla.indexes if [c.name for c in ix.columns] == ["documento"])
+    try:
+        indice.create(bind=conn)
+    except Exception as e:
+        raise RuntimeError(
+            f"No se pudo crear el índice único '{indice.name}'. "
+            "Verifique que no existan documentos duplicados en la tabla registros."
+        ) from e
+    logger.info("Índice '%s' creado", indice.name)
+
+
+# Pasos en orden de aplicación: (nombre, comprobación, paso). Cada paso debe ser idempotente.
+MIGRACIONES: List[Tuple[str, Callable[[Connection], bool], Callable[[Connection], None]]] = [
+    ("0001_indice_unico_documento", indice_unico_documento_aplicado, indice_unico_documento),
+]
+
+
+def upgrade(bind: Optional[Engine] = None) -> None:
+    """Crea las tablas que falten y aplica los pasos de migración pendientes."""
+    from .database import Base, engine
+    from .. import models  # noqa: F401  (registra los modelos en Base.metadata)
+
+    bind = bind or engine
+    Base.metadata.create_all(bind=bind)
+
+    with bind.begin() as conn:
+        for nombre, _, paso in MIGRACIONES:
+            logger.debug("Aplicando migración %s", nombre)
+            paso(conn)
+
+
+def pendientes(bind: Optional[Engine] = None) -> List[str]:
+    """Tablas que faltan y pasos de migración sin aplicar, sin modificar el esquema."""
+    from .database import Base, engine
+    from .. import models  # noqa: F401  (registra los modelos en Base.metadata)
+
+    bind = bind or engine
+    with bind.connect() as conn:
+        inspector = inspect(conn)
+        faltantes = [f"tabla {tabla}" for tabla in Base.metadata.tables if not inspector.has_table(tabla)]
+        if faltantes:
+            # Sin las tablas no tiene sentido comprobar los pasos sobre ellas
+            return faltantes
+        return [nombre for nombre, aplicada, _ in MIGRACIONES if not aplicada(conn)]
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    if "--check" in sys.argv[1:]:
+        faltan = pendientes()
+        if faltan:
+            logger.error("Migraciones pendientes: %s", ", ".join(faltan))
+            sys.exit(1)
+        logger.info("Sin migraciones pendientes")
+    else:
+        upgrade()
+        logger.info("Esquema actualizado")
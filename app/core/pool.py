@@ -0,0 +1,279 @@
+"""
+Configuración y estadísticas del pool de conexiones.
+
+Las estadísticas se obtienen de los eventos del pool (checkout, checkin, connect,
+invalidate) y de `TimedQueuePool`, que mide cuánto espera cada checkout por una
+conexión libre. Sirven para dimensionar DB_POOL_SIZE / DB_MAX_OVERFLOW por worker.
+
+`prewarm` abre conexiones al arrancar el worker (el connect ODBC con TLS no lo paga
+la primera petición) y `keepalive` hace ping a las conexiones inactivas para que un
+firewall no las corte. Ambas tienen su variante para el AsyncEngine. Los checkouts
+del keepalive no cuentan en las estadísticas de las peticiones (se informan aparte
+en `keepalive_pings`).
+"""
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+from sqlalchemy.util import greenlet_spawn
+from starlette.concurrency import run_in_threadpool
+from . import server_timing
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# True mientras el keepalive toma conexiones: sus checkouts no son de peticiones
+_en_keepalive: ContextVar[bool] = ContextVar("en_keepalive", default=False)
+
+
+class PoolStats:
+    """Contadores de un pool; seguros entre hilos."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.soft_invalidations = 0
+        self.timeouts = 0
+        self.keepalive_pings = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def incr(self, nombre: str) -> None:
+        with self._lock:
+            setattr(self, nombre, getattr(self, nombre) + 1)
+
+    def record_wait(self, segundos: float, timeout: bool = False) -> None:
+        with self._lock:
+            self.wait_total += segundos
+            self.wait_max = max(self.wait_max, segundos)
+            if timeout:
+                self.timeouts += 1
+
+    def snapshot(self, pool: Pool) -> Dict[str, Any]:
+        with self._lock:
+            datos = {
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "soft_invalidations": self.soft_invalidations,
+                "timeouts": self.timeouts,
+                "keepalive_pings": self.keepalive_pings,
+                "wait_avg_ms": self.wait_total / self.checkouts * 1000 if self.checkouts else 0.0,
+                "wait_max_ms": self.wait_max * 1000,
+            }
+        datos["pool"] = type(pool).__name__
+        if isinstance(pool, QueuePool):
+            datos.update({
+                "size": pool.size(),
+                "in_use": pool.checkedout(),
+                "idle": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "max_overflow": pool._max_overflow,
+            })
+        return datos
+
+
+class _TimedPoolMixin:
+    """Mide la espera de cada checkout, incluidos los que agotan DB_POOL_TIMEOUT."""
+
+    stats: PoolStats
+
+    def connect(self):
+        if _en_keepalive.get():
+            return super().connect()
+        inicio = time.perf_counter()
+        try:
+            conexion = super().connect()
+        except PoolTimeoutError:
+            self.stats.record_wait(time.perf_counter() - inicio, timeout=True)
+            raise
+        espera = time.perf_counter() - inicio
+        self.stats.record_wait(espera)
+        server_timing.add("pool", espera)
+        return conexion
+
+    def recreate(self):
+        # engine.dispose() reemplaza el pool; las estadísticas se conservan
+        nuevo = super().recreate()
+        nuevo.stats = self.stats
+        return nuevo
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_options(uri: str, asincrono: bool = False) -> Dict[str, Any]:
+    """
+    Argumentos de create_engine para el pool según Settings.
+
+    En SQLite se conserva el pool por defecto del dialecto y se omiten tamaño,
+    overflow y timeout (no tiene sentido dimensionarlo para un archivo local).
+    """
+    opciones: Dict[str, Any] = {
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+    if make_url(uri).get_backend_name() == "sqlite":
+        return opciones
+
+    opciones.update({
+        "poolclass": TimedAsyncAdaptedQueuePool if asincrono else TimedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_use_lifo": settings.DB_POOL_USE_LIFO,
+    })
+    return opciones
+
+
+def instrument_pool(pool: Pool) -> PoolStats:
+    """Registra los eventos del pool y devuelve sus estadísticas."""
+    stats = PoolStats()
+    pool.stats = stats
+
+    def contar(nombre: str):
+        def listener(*args) -> None:
+            if not _en_keepalive.get():
+                stats.incr(nombre)
+        return listener
+
+    event.listen(pool, "connect", lambda *args: stats.incr("connects"))
+    event.listen(pool, "checkout", contar("checkouts"))
+    event.listen(pool, "checkin", contar("checkins"))
+    event.listen(pool, "invalidate", lambda *args: stats.incr("invalidations"))
+    event.listen(pool, "soft_invalidate", lambda *args: stats.incr("soft_invalidations"))
+    return stats
+
+
+def _a_precalentar(pool: Pool, cantidad: int) -> int:
+    """Conexiones que tiene sentido abrir: las de overflow se cerrarían al devolverlas."""
+    if not isinstance(pool, QueuePool):
+        return 0
+    return max(min(cantidad, pool.size()), 0)
+
+
+def _abrir(engine: Engine):
+    try:
+        return engine.raw_connection()
+    except Exception as e:
+        logger.warning("No se pudo abrir una conexión del pool al arrancar: %s", e)
+        return None
+
+
+def prewarm(engine: Engine, cantidad: int) -> int:
+    """Abre `cantidad` conexiones en paralelo y las deja en el pool. Devuelve las abiertas."""
+    cantidad = _a_precalentar(engine.pool, cantidad)
+    if not cantidad:
+        return 0
+    # Se mantienen todas abiertas a la vez para que cada una sea una conexión distinta
+    with ThreadPoolExecutor(cantidad, thread_name_prefix="prewarm") as executor:
+        conexiones = [c for c in executor.map(lambda _: _abrir(engine), range(cantidad)) if c is not None]
+    for conexion in conexiones:
+        conexion.close()
+    return len(conexiones)
+
+
+async def prewarm_async(async_engine, cantidad: int) -> int:
+    """Como `prewarm`, para un AsyncEngine."""
+    cantidad = _a_precalentar(async_engine.sync_engine.pool, cantidad)
+    if not cantidad:
+        return 0
+    resultados = await asyncio.gather(
+        *(async_engine.connect().start() for _ in range(cantidad)), return_exceptions=True
+    )
+    abiertas = 0
+    for resultado in resultados:
+        if isinstance(resultado, Exception):
+            logger.warning("No se pudo abrir una conexión del pool al arrancar: %s", resultado)
+            continue
+        await resultado.close()
+        abiertas += 1
+    return abiertas
+
+
+def _ping_inactiva(pool: QueuePool) -> bool:
+    """
+    Toma una conexión inactiva, le hace ping y la devuelve. Con pool_pre_ping el propio
+    checkout es el ping (y reemplaza la conexión si estaba caída); sin él se hace aquí.
+    """
+    conexion = pool.connect()
+    try:
+        if not pool._pre_ping:
+            pool._dialect.do_ping(conexion.dbapi_connection)
+        return True
+    except Exception as e:
+        logger.info("Conexión inactiva descartada por el keepalive: %s", e)
+        conexion.invalidate()
+        return False
+    finally:
+        conexion.close()
+
+
+def _keepalive_pool(pool: Pool) -> int:
+    """
+    Recorre las conexiones inactivas de una en una, de modo que las peticiones
+    concurrentes siguen encontrando conexiones libres en lugar de abrir de overflow.
+    En un pool FIFO cada checkout toma la más antigua y la devuelve al final, así que
+    `checkedin()` vueltas pasan por todas (con DB_POOL_USE_LIFO solo se mantiene la de
+    la cima; el resto se deja expirar, que es lo que busca LIFO).
+    """
+    if not isinstance(pool, QueuePool):
+        return 0
+    token = _en_keepalive.set(True)
+    try:
+        vivas = 0
+        for _ in range(pool.checkedin()):
+            # Si las peticiones ya las están usando no hay nada inactivo que mantener
+            if pool.checkedin() == 0:
+                break
+            if _ping_inactiva(pool):
+                vivas += 1
+                if getattr(pool, "stats", None) is not None:
+                    pool.stats.incr("keepalive_pings")
+        return vivas
+    finally:
+        _en_keepalive.reset(token)
+
+
+def keepalive(engine: Engine) -> int:
+    """
+    Hace ping a las conexiones inactivas del pool. Devuelve cuántas respondieron.
+
+    Las que fallan se invalidan y el pool las reemplaza en el siguiente checkout.
+    """
+    return _keepalive_pool(engine.pool)
+
+
+async def keepalive_async(async_engine) -> int:
+    """Como `keepalive`, para un AsyncEngine (el pool se usa desde un greenlet)."""
+    return await greenlet_spawn(_keepalive_pool, async_engine.sync_engine.pool)
+
+
+async def keepalive_loop(engine: Engine, async_engine=None, intervalo: Optional[float] = None) -> None:
+    """Tarea de fondo del lifespan: `keepalive` cada `intervalo` segundos hasta cancelarla."""
+    intervalo = settings.DB_POOL_KEEPALIVE_INTERVAL if intervalo is None else intervalo
+    while True:
+        await asyncio.sleep(intervalo)
+        try:
+            vivas = await run_in_threadpool(keepalive, engine)
+            if async_engine is not None:
+                vivas += await keepalive_async(async_engine)
+            logger.debug("Keepalive del pool: %d conexiones verificadas", vivas)
+        except Exception as e:
+            logger.warning("Error en el keepalive del pool: %s", e)
@@ -0,0 +1,196 @@
+"""
+Rate limiting compartido entre los workers de un mismo host.
+
+`SQLiteStorage` es un backend de `limits` sobre un archivo SQLite local (modo WAL): los
+contadores de ventana deslizante son visibles para todos los procesos uvicorn sin
+necesitar Redis. Las claves inactivas expiran solas y se purgan periódicamente, y
+RATE_LIMIT_MAX_KEYS acota el tamaño de la tabla. Con la tabla llena (tras purgar las
+expiradas) los clientes nuevos se admiten sin contador, con un aviso en el log, hasta
+que expiren claves: rechazarlos dejaría fuera a todo usuario nuevo mientras dure una
+inundación de claves, y borrar contadores vigentes reiniciaría el límite de los
+clientes activos. Los clientes con contador siguen limitados. El archivo se abre en el
+primer uso.
+"""
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Optional, Tuple
+from urllib.parse import urlparse
+from limits import RateLimitItem, parse
+from limits.storage import Storage, storage_from_string
+from limits.storage.base import SlidingWindowCounterSupport, TimestampedSlidingWindow
+from limits.strategies import SlidingWindowCounterRateLimiter
+from slowapi import Limiter
+from slowapi.util import get_remote_address
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Cada cuántos segundos se eliminan las claves expiradas (más a menudo con la tabla llena)
+PURGA_INTERVALO = 60.0
+PURGA_INTERVALO_LLENA = 5.0
+
+
+class SQLiteStorage(Storage, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    """
+    Storage de `limits` para URIs `sqlite:///ruta/al/archivo.db`.
+
+    Cada incremento es una única sentencia UPSERT, atómica entre procesos.
+    """
+
+    STORAGE_SCHEME = ["sqlite"]
+
+    def __init__(self, uri: Optional[str] = None, wrap_exceptions: bool = False, **options):
+        ruta = urlparse(uri).path if uri else ""
+        # sqlite:///rel.db -> "/rel.db"; sqlite:////abs.db -> "//abs.db"
+        ruta = ruta[1:] if ruta.startswith("/") else ruta
+        self.path = ruta or os.path.join(tempfile.gettempdir(), "fastapi_rate_limit.db")
+        self.max_keys = int(options.get("max_keys", settings.RATE_LIMIT_MAX_KEYS))
+        self._lock = threading.Lock()
+        self._ultima_purga = 0.0
+        self.llena = False
+
+        self._conn: Optional[sqlite3.Connection] = None
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+
+    def _conexion(self) -> sqlite3.Connection:
+        """
+        Conexión al archivo, que se abre (y se crea la tabla) en el primer uso para que
+        importar la aplicación no toque el disco. Se llama con `_lock` adquirido.
+        """
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS contadores ("
+                "clave TEXT PRIMARY KEY, valor INTEGER NOT NULL, expira REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_contadores_expira ON contadores (expira)")
+            self._conn = conn
+        return self._conn
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _purgar(self, ahora: float) -> None:
+        """Elimina las claves expiradas y comprueba si la tabla sigue por encima de max_keys."""
+        if ahora - self._ultima_purga < (PURGA_INTERVALO_LLENA if self.llena else PURGA_INTERVALO):
+            return
+        self._ultima_purga = ahora
+        self._conexion().execute("DELETE FROM contadores WHERE expira <= ?", (ahora,))
+        (total,) = self._conexion().execute("SELECT COUNT(*) FROM contadores").fetchone()
+        llena = total >= self.max_keys
+        if llena and not self.llena:
+            logger.warning(
+                "Rate limiting: %d claves vigentes (máximo %d); los clientes nuevos se admiten "
+                "sin limitar hasta que expiren claves",
+                total, self.max_keys
+            )
+        self.llena = llena
+
+    def incr(self, key: str, expiry: float, amount: int = 1) -> int:
+        ahora = time.time()
+        with self._lock:
+            self._purgar(ahora)
+            (valor,) = self._conexion().execute(
+                "INSERT INTO contadores (clave, valor, expira) VALUES (:clave, :cantidad, :expira) "
+                "ON CONFLICT (clave) DO UPDATE SET "
+                "valor = CASE WHEN expira <= :ahora THEN :cantidad ELSE valor + :cantidad END, "
+                "expira = CASE WHEN expira <= :ahora THEN :expira ELSE expira END "
+                "RETURNING valor",
+                {"clave": key, "cantidad": amount, "expira": ahora + expiry, "ahora": ahora}
+            ).fetchone()
+        return valor
+
+    def decr(self, key: str, amount: int = 1) -> int:
+        with self._lock:
+            fila = self._conexion().execute(
+                "UPDATE contadores SET valor = MAX(valor - ?, 0) WHERE clave = ? AND expira > ? RETURNING valor",
+                (amount, key, time.time())
+            ).fetchone()
+        return fila[0] if fila else 0
+
+    def _leer(self, key: str, ahora: float) -> Tuple[int, float]:
+        with self._lock:
+            fila = self._conexion().execute(
+                "SELECT valor, expira FROM contadores WHERE clave = ? AND expira > ?", (key, ahora)
+            ).fetchone()
+        return (fila[0], fila[1]) if fila else (0, ahora)
+
+    def get(self, key: str) -> int:
+        return self._leer(key, time.time())[0]
+
+    def get_expiry(self, key: str) -> float:
+        return self._leer(key, time.time())[1]
+
+    def check(self) -> bool:
+        try:
+            with self._lock:
+                self._conexion().execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self) -> Optional[int]:
+        with self._lock:
+            return self._conexion().execute("DELETE FROM contadores").rowcount
+
+    def clear(self, key: str) -> None:
+        with self._lock:
+            self._conexion().execute("DELETE FROM contadores WHERE clave = ?", (key,))
+
+    def acquire_sliding_window_entry(self, key: str, limit: int, expiry: int, amount: int = 1) -> bool:
+        if amount > limit:
+            return False
+        ahora = time.time()
+        previous_key, current_key = self.sliding_window_keys(key, expiry, ahora)
+        previous_count, previous_ttl, current_count, _ = self._ventana(previous_key, current_key, expiry, ahora)
+        if int(previous_count * previous_ttl / expiry + current_count) + amount > limit:
+            return False
+        with self._lock:
+            self._purgar(ahora)
+            # Con la tabla llena los clientes sin contador pasan sin crearlo (fail open)
+            if self.llena and previous_count == 0 and current_count == 0:
+                return True
+
+        # La ventana actual se conserva durante dos periodos para ser la "anterior" de la siguiente
+        current_count = self.incr(current_key, 2 * expiry, amount=amount)
+        if int(previous_count * previous_ttl / expiry + current_count) > limit:
+            # Otro proceso ganó la carrera: se revierte el incremento
+            self.decr(current_key, amount)
+            return False
+        return True
+
+    def _ventana(self, previous_key: str, current_key: str, expiry: int, ahora: float) -> Tuple[int, float, int, float]:
+        previous_count = self._leer(previous_key, ahora)[0]
+        current_count = self._leer(current_key, ahora)[0]
+        previous_ttl = 0.0 if previous_count == 0 else (1 - (((ahora - expiry) / expiry) % 1)) * expiry
+        current_ttl = (1 - ((ahora / expiry) % 1)) * expiry + expiry
+        return previous_count, previous_ttl, current_count, current_ttl
+
+    def get_sliding_window(self, key: str, expiry: int) -> Tuple[int, float, int, float]:
+        ahora = time.time()
+        previous_key, current_key = self.sliding_window_keys(key, expiry, ahora)
+        return self._ventana(previous_key, current_key, expiry, ahora)
+
+    def clear_sliding_window(self, key: str, expiry: int) -> None:
+        previous_key, current_key = self.sliding_window_keys(key, expiry, time.time())
+        self.clear(previous_key)
+        self.clear(current_key)
+
+
+# Limiter de los endpoints REST (decorador @limiter.limit)
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=settings.RATE_LIMIT_STORAGE_URI,
+    strategy="sliding-window-counter"
+)
+
+# Límite de /graphql: cada operación consume tantas unidades como su costo estimado
+graphql_limit: Optional[RateLimitItem] = parse(settings.GRAPHQL_RATE_LIMIT) if settings.GRAPHQL_RATE_LIMIT else None
+graphql_rate_limiter = SlidingWindowCounterRateLimiter(storage_from_string(settings.RATE_LIMIT_STORAGE_URI))
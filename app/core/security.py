@@ -1,22 +1,54 @@
+import asyncio
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Set, Union
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session, object_session
 from ..exceptions import UnauthorizedException, ForbiddenException
 from ..models import Usuario
 from ..schemas import TokenData
-from ..core.database import get_db
+from ..core.database import run_db
 from ..core.config import settings
+from ..utils.cache import LRUCache
 
 # Configuración de seguridad para contraseñas
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt es CPU-bound: se ejecuta en un pool propio y acotado para no bloquear el
+# event loop ni ocupar el threadpool que usan las consultas a la base de datos
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.AUTH_HASH_CONCURRENCY,
+    thread_name_prefix="bcrypt"
+)
+
 # Configuración de OAuth2
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
+# Claims ya verificados por hash del token. Los tokens inválidos se guardan como el
+# mensaje de error durante TOKEN_CACHE_NEGATIVE_TTL segundos.
+token_cache: LRUCache[str, Union[TokenData, str]] = LRUCache(settings.TOKEN_CACHE_SIZE)
+
+
+@dataclass(frozen=True)
+class UsuarioActual:
+    """Datos del usuario autenticado que necesitan las dependencias de autorización."""
+    id: int
+    username: str
+    is_active: bool
+    is_admin: bool
+
+
+# Usuarios autenticados por username. Las escrituras ORM sobre Usuario en este proceso
+# invalidan la entrada; USER_CACHE_TTL acota el tiempo que otro worker puede verla desactualizada.
+user_cache: LRUCache[str, UsuarioActual] = LRUCache(settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verifica si la contraseña coincide con el hash."""
@@ -28,6 +60,18 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Igual que `verify_password`, ejecutado en el pool de bcrypt."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Igual que `get_password_hash`, ejecutado en el pool de bcrypt."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, get_password_hash, password)
+
+
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     """Crea un token JWT con los datos proporcionados."""
     to_encode = data.copy()
@@ -43,8 +87,8 @@ def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta]
     return encoded_jwt
 
 
-def decode_token(token: str) -> TokenData:
-    """Decodifica un token JWT y devuelve los datos del token."""
+def _verificar_token(token: str) -> TokenData:
+    """Verifica la firma y la expiración del token y extrae sus datos."""
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         username: str = payload.get("sub")
@@ -59,17 +103,86 @@ def decode_token(token: str) -> TokenData:
         raise UnauthorizedException("Token inválido o expirado")
 
 
-async def get_current_user(
-        token: str = Depends(oauth2_scheme),
-        db: Session = Depends(get_db)
-) -> Usuario:
-    """Obtiene el usuario actual basado en el token JWT."""
+def decode_token(token: str) -> TokenData:
+    """
+    Decodifica un token JWT y devuelve los datos del token.
+
+    El resultado de la verificación se guarda en `token_cache` hasta la expiración del token.
+    """
+    clave = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    cached = token_cache.get(clave)
+    if isinstance(cached, TokenData):
+        return cached
+    if cached is not None:
+        raise UnauthorizedException(cached)
+
+    try:
+        token_data = _verificar_token(token)
+    except UnauthorizedException as e:
+        token_cache.set(clave, e.detail, ttl=settings.TOKEN_CACHE_NEGATIVE_TTL)
+        raise
+
+    restante = token_data.exp.timestamp() - time.time()
+    if restante > 0:
+        token_cache.set(clave, token_data, ttl=restante)
+    return token_data
+
+
+def _cargar_usuario(db: Session, username: str) -> Optional[UsuarioActual]:
+    fila = db.execute(
+        select(Usuario.id, Usuario.username, Usuario.is_active, Usuario.is_admin)
+        .where(Usuario.username == username)
+    ).first()
+    if fila is None:
+        return None
+    return UsuarioActual(
+        id=fila.id,
+        username=fila.username,
+        is_active=bool(fila.is_active),
+        is_admin=bool(fila.is_admin)
+    )
+
+
+def _usernames_modificados(session: Session) -> Set[str]:
+    return session.info.setdefault("usuarios_modificados", set())
+
+
+@event.listens_for(Usuario, "after_update")
+@event.listens_for(Usuario, "after_delete")
+def _invalidar_usuario(mapper, connection, target: Usuario) -> None:
+    """Invalida el usuario modificado, también bajo su username anterior si cambió."""
+    usernames = {target.username, *inspect(target).attrs.username.history.deleted}
+    session = object_session(target)
+    for username in usernames:
+        user_cache.pop(username)
+        if session is not None:
+            # Se vuelve a invalidar tras el commit por si otra petición lo recargó antes
+            _usernames_modificados(session).add(username)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidar_usuarios_confirmados(session: Session) -> None:
+    for username in session.info.pop("usuarios_modificados", ()):
+        user_cache.pop(username)
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_usuarios_modificados(session: Session) -> None:
+    session.info.pop("usuarios_modificados", None)
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> UsuarioActual:
+    """Obtiene el usuario actual basado en el token JWT (desde `user_cache` si es posible)."""
     try:
         token_data = decode_token(token)
-        user = db.query(Usuario).filter(Usuario.username == token_data.username).first()
-
+        user = user_cache.get(token_data.username)
         if user is None:
-            raise UnauthorizedException("Usuario no encontrado")
+            user = await run_db(_cargar_usuario, token_data.username)
+
+            if user is None:
+                raise UnauthorizedException("Usuario no encontrado")
+
+            user_cache.set(user.username, user)
 
         return user
     except JWTError:
@@ -77,8 +190,8 @@ async def get_current_user(
 
 
 async def get_current_active_user(
-        current_user: Usuario = Depends(get_current_user)
-) -> Usuario:
+        current_user: UsuarioActual = Depends(get_current_user)
+) -> UsuarioActual:
     """Verifica que el usuario actual esté activo."""
     if not current_user.is_active:
         raise ForbiddenException("Usuario inactivo")
@@ -87,8 +200,8 @@ async def get_current_active_user(
 
 
 async def get_current_admin_user(
-        current_user: Usuario = Depends(get_current_active_user)
-) -> Usuario:
+        current_user: UsuarioActual = Depends(get_current_active_user)
+) -> UsuarioActual:
     """Verifica que el usuario actual tenga permisos de administrador."""
     if not current_user.is_admin:
         raise ForbiddenException("Acceso denegado: se requieren privilegios de administrador")
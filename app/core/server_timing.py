@@ -0,0 +1,54 @@
+"""
+Cabecera `Server-Timing` con el desglose por fases de cada petición.
+
+El middleware de app.main crea un `ServerTiming` por petición (contextvar). Las fases
+las añaden quienes las conocen: la extensión GraphQL (parse, validate, execute), el
+router (serialize), el pool (pool, espera del checkout) y `registrar_sentencia`, suscrito
+a los listeners de app.core.database (db). Todas las medidas usan time.perf_counter.
+"""
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+# Orden de las fases en la cabecera
+FASES = ("parse", "validate", "execute", "db", "pool", "serialize")
+
+
+class ServerTiming:
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.fases: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, fase: str, segundos: float) -> None:
+        # La fase db se acumula desde hilos del threadpool en paralelo
+        with self._lock:
+            self.fases[fase] = self.fases.get(fase, 0.0) + segundos
+
+    def header(self) -> str:
+        total = time.perf_counter() - self.inicio
+        partes = [f"{fase};dur={self.fases[fase] * 1000:.3f}" for fase in FASES if fase in self.fases]
+        partes.append(f"total;dur={total * 1000:.3f}")
+        return ", ".join(partes)
+
+
+_current: ContextVar[Optional[ServerTiming]] = ContextVar("server_timing", default=None)
+
+
+def start() -> ServerTiming:
+    timing = ServerTiming()
+    _current.set(timing)
+    return timing
+
+
+def add(fase: str, segundos: float) -> None:
+    """Suma `segundos` a la fase de la petición en curso (sin petición no hace nada)."""
+    timing = _current.get()
+    if timing is not None:
+        timing.add(fase, segundos)
+
+
+def registrar_sentencia(sentencia) -> None:
+    """Suscriptor de app.core.database: suma la duración de la sentencia a la fase db."""
+    add("db", sentencia.duracion)
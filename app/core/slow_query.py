@@ -0,0 +1,163 @@
+"""
+Log de sentencias SQL lentas.
+
+Las sentencias que superan SLOW_QUERY_THRESHOLD_MS se registran (con probabilidad
+SLOW_QUERY_SAMPLE_RATE) como una línea JSON en SLOW_QUERY_LOG_PATH, con rotación por
+tamaño. Cada entrada incluye la sentencia, la forma de los parámetros (tipos, nunca
+valores), la duración y el resolver GraphQL que la originó. Con SLOW_QUERY_EXPLAIN se
+añade el plan estimado: SET SHOWPLAN_XML en SQL Server, EXPLAIN QUERY PLAN en SQLite.
+
+El plan se obtiene en segundo plano, con otra conexión del pool: la conexión original
+puede tener aún el resultado sin leer (sin MARS, SQL Server la rechazaría por ocupada)
+y la petición no espera el viaje adicional. La entrada se escribe al tener el plan.
+"""
+import json
+import logging
+import os
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from typing import Any, Dict, Optional
+from .config import settings
+from .sql_stats import current_resolver
+
+logger = logging.getLogger(__name__)
+
+# Sentencias de las que se puede pedir un plan estimado
+SENTENCIAS_CON_PLAN = ("SELECT", "INSERT", "UPDATE", "DELETE", "MERGE", "WITH")
+# Planes en cola como máximo; por encima, las entradas se escriben sin plan
+MAX_PLANES_PENDIENTES = 100
+
+slow_query_logger = logging.getLogger("app.slow_queries")
+slow_query_logger.propagate = False
+_handler_lock = threading.Lock()
+
+_planes_lock = threading.Lock()
+_planes_pendientes = 0
+_planes_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _configurar_archivo() -> None:
+    """Crea el handler del archivo la primera vez que hay algo que escribir."""
+    with _handler_lock:
+        if not slow_query_logger.handlers:
+            _agregar_handler()
+
+
+def _agregar_handler() -> None:
+    directorio = os.path.dirname(settings.SLOW_QUERY_LOG_PATH)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    handler = RotatingFileHandler(
+        settings.SLOW_QUERY_LOG_PATH,
+        maxBytes=settings.SLOW_QUERY_LOG_MAX_BYTES,
+        backupCount=settings.SLOW_QUERY_LOG_BACKUPS,
+        encoding="utf-8"
+    )
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    slow_query_logger.addHandler(handler)
+    slow_query_logger.setLevel(logging.INFO)
+
+
+def parameter_shape(parameters: Any, executemany: bool = False) -> Any:
+    """Describe los parámetros por su tipo: (int, str), {documento: int} o [N x (...)]."""
+    if executemany:
+        filas = list(parameters or ())
+        return f"[{len(filas)} x {parameter_shape(filas[0]) if filas else '()'}]"
+    if isinstance(parameters, dict):
+        return {clave: type(valor).__name__ for clave, valor in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(type(valor).__name__ for valor in parameters) + ")"
+    return type(parameters).__name__
+
+
+def _plan(statement: str, parameters: Any) -> Optional[str]:
+    """
+    Plan estimado de la sentencia, sin ejecutarla, en una conexión del pool distinta
+    de la que la ejecutó. Se usa el cursor DBAPI directamente (sin eventos de SQLAlchemy).
+    """
+    from .database import engine
+
+    dialecto = engine.dialect.name
+    if dialecto not in ("sqlite", "mssql"):
+        return None
+    conexion = engine.raw_connection()
+    try:
+        cursor = conexion.cursor()
+        try:
+            if dialecto == "sqlite":
+                cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+                return "\n".join(str(fila[-1]) for fila in cursor.fetchall())
+            cursor.execute("SET SHOWPLAN_XML ON")
+            try:
+                cursor.execute(statement, parameters)
+                fila = cursor.fetchone()
+                return fila[0] if fila else None
+            finally:
+                cursor.execute("SET SHOWPLAN_XML OFF")
+        finally:
+            cursor.close()
+    except Exception as e:
+        logger.warning("No se pudo obtener el plan de la sentencia lenta: %s", e)
+        if dialecto == "mssql":
+            # La conexión pudo quedar con SHOWPLAN activo: no debe volver al pool
+            conexion.invalidate()
+        return None
+    finally:
+        conexion.close()
+
+
+def _escribir(entrada: Dict[str, Any]) -> None:
+    _configurar_archivo()
+    slow_query_logger.info(json.dumps(entrada, ensure_ascii=False, default=str))
+
+
+def _escribir_con_plan(entrada: Dict[str, Any], statement: str, parameters: Any) -> None:
+    global _planes_pendientes
+    try:
+        entrada["plan"] = _plan(statement, parameters)
+        _escribir(entrada)
+    finally:
+        with _planes_lock:
+            _planes_pendientes -= 1
+
+
+def _encolar_plan(entrada: Dict[str, Any], statement: str, parameters: Any) -> bool:
+    """Programa la obtención del plan y la escritura de la entrada; False si la cola está llena."""
+    global _planes_pendientes, _planes_executor
+    with _planes_lock:
+        if _planes_pendientes >= MAX_PLANES_PENDIENTES:
+            return False
+        _planes_pendientes += 1
+        if _planes_executor is None:
+            _planes_executor = ThreadPoolExecutor(1, thread_name_prefix="slow-query-plan")
+    _planes_executor.submit(_escribir_con_plan, entrada, statement, parameters)
+    return True
+
+
+def registrar_sentencia(sentencia) -> None:
+    """Suscriptor de app.core.database: registra la sentencia si supera el umbral."""
+    if not settings.SLOW_QUERY_LOG_PATH or sentencia.error is not None:
+        return
+    duracion_ms = sentencia.duracion * 1000
+    if duracion_ms < settings.SLOW_QUERY_THRESHOLD_MS or random.random() >= settings.SLOW_QUERY_SAMPLE_RATE:
+        return
+
+    statement, parameters, executemany = sentencia.statement, sentencia.parameters, sentencia.executemany
+    entrada = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "durationMs": round(duracion_ms, 3),
+        "resolver": current_resolver(),
+        "statement": statement,
+        "parameters": parameter_shape(parameters, executemany),
+    }
+    if (
+            settings.SLOW_QUERY_EXPLAIN
+            and not executemany
+            and statement.lstrip()[:6].upper().startswith(SENTENCIAS_CON_PLAN)
+            and _encolar_plan(entrada, statement, parameters)
+    ):
+        return
+    _escribir(entrada)
@@ -0,0 +1,111 @@
+"""
+Estadísticas de SQL por operación.
+
+`track()` activa un `SqlStats` en el contexto actual (contextvar); `registrar_sentencia`
+(suscrito a los listeners de app.core.database) anota en él cada sentencia ejecutada. El contexto se propaga al threadpool
+de run_db, a AsyncSession.run_sync y a las tareas de los DataLoaders, por lo que se
+cuentan todas las sentencias de la operación.
+
+Las sentencias se agrupan por forma (el SQL con parámetros, normalizado): una forma
+que se repite SQL_N_PLUS_ONE_THRESHOLD veces o más indica un patrón N+1.
+"""
+import re
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+from .config import settings
+
+_ESPACIOS = re.compile(r"\s+")
+# IN con expanding parameters: la forma no depende del número de elementos
+_LISTA_IN = re.compile(r"\bIN\s*\((?:\s*[?:%@$][\w()]*\s*,)*\s*[?:%@$][\w()]*\s*\)", re.IGNORECASE)
+
+
+def statement_shape(statement: str) -> str:
+    return _LISTA_IN.sub("IN (...)", _ESPACIOS.sub(" ", statement).strip())
+
+
+class SqlStats:
+    """Sentencias ejecutadas durante una operación."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.errors = 0
+        self.duration = 0.0
+        self.shapes: Dict[str, List[float]] = {}
+        self.shape_errors: Dict[str, int] = {}
+
+    def record(self, statement: str, duracion: float, error: bool = False) -> None:
+        """Anota una sentencia; las fallidas también cuentan (fueron un viaje al servidor)."""
+        forma = statement_shape(statement)
+        with self._lock:
+            self.count += 1
+            self.duration += duracion
+            self.shapes.setdefault(forma, []).append(duracion)
+            if error:
+                self.errors += 1
+                self.shape_errors[forma] = self.shape_errors.get(forma, 0) + 1
+
+    def repeated(self, minimo: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Formas ejecutadas al menos `minimo` veces (posibles N+1), de más a menos repetida."""
+        minimo = settings.SQL_N_PLUS_ONE_THRESHOLD if minimo is None else minimo
+        with self._lock:
+            repetidas = [
+                {
+                    "statement": forma,
+                    "count": len(duraciones),
+                    "errors": self.shape_errors.get(forma, 0),
+                    "durationMs": round(sum(duraciones) * 1000, 3),
+                }
+                for forma, duraciones in self.shapes.items()
+                if len(duraciones) >= minimo
+            ]
+        return sorted(repetidas, key=lambda r: r["count"], reverse=True)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "queries": self.count,
+            "errors": self.errors,
+            "durationMs": round(self.duration * 1000, 3),
+            "repeated": self.repeated(),
+        }
+
+
+_current: ContextVar[Optional[SqlStats]] = ContextVar("sql_stats", default=None)
+# Resolver raíz en ejecución (lo fija ResolverMetrics), para atribuir las sentencias
+_resolver: ContextVar[Optional[str]] = ContextVar("sql_resolver", default=None)
+
+
+def current() -> Optional[SqlStats]:
+    return _current.get()
+
+
+@contextmanager
+def track() -> Iterator[SqlStats]:
+    stats = SqlStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def current_resolver() -> Optional[str]:
+    return _resolver.get()
+
+
+@contextmanager
+def resolving(nombre: str) -> Iterator[None]:
+    token = _resolver.set(nombre)
+    try:
+        yield
+    finally:
+        _resolver.reset(token)
+
+
+def registrar_sentencia(sentencia) -> None:
+    """Suscriptor de app.core.database: anota la sentencia en la operación en curso."""
+    stats = _current.get()
+    if stats is not None and sentencia.statement is not None:
+        stats.record(sentencia.statement, sentencia.duracion, error=sentencia.error is not None)
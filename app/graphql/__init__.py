@@ -1,7 +1,16 @@
 import strawberry
 from .resolvers import Query, Mutation
+from .context import get_context
+from .router import GraphQLRouter
+from .extensions import DocumentCache, QueryCostLimiter, GraphQLRateLimiter, SqlStatsExtension, ServerTimingExtension, PrometheusMetrics
 
 # Crear el esquema GraphQL
-schema = strawberry.Schema(query=Query, mutation=Mutation)
+schema = strawberry.Schema(
+    query=Query,
+    mutation=Mutation,
+    extensions=[
+        DocumentCache, QueryCostLimiter, GraphQLRateLimiter, SqlStatsExtension, ServerTimingExtension, PrometheusMetrics
+    ],
+)
 
-__all__ = ["schema"]
\ No newline at end of file
+__all__ = ["schema", "get_context", "GraphQLRouter"]
\ No newline at end of file
@@ -0,0 +1,9 @@
+from typing import Any, Dict
+from .dataloaders import Loaders
+
+
+async def get_context() -> Dict[str, Any]:
+    """Contexto por petición para Strawberry (se combina con request/response)"""
+    return {
+        "loaders": Loaders(),
+    }
@@ -0,0 +1,174 @@
+"""
+Análisis estático del costo de una operación GraphQL.
+
+Modelo de costo:
+- Cada campo cuesta 1 más el costo de sus subcampos.
+- Los argumentos `limit`/`first` definen el tamaño de página del subárbol; los campos
+  de tipo lista dentro de ese subárbol multiplican el costo de sus subcampos por ese
+  tamaño (ajustado a MAX_LIMIT, igual que en los resolvers). Sin argumento se usa
+  DEFAULT_LIMIT.
+- Los campos de introspección (`__schema`, `__type`, `__typename`) no cuentan.
+- Como en `collect_fields` de graphql-core, cada fragmento se expande una sola vez por
+  conjunto de selección aunque se use varias veces.
+
+Con límites, el análisis se interrumpe en cuanto la operación supera la profundidad,
+el número de alias o el número de campos (cada campo cuesta al menos 1), de modo que
+un documento pequeño no puede obligar a recorrer un árbol enorme.
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Set
+from graphql import (
+    DocumentNode,
+    FieldNode,
+    FragmentDefinitionNode,
+    FragmentSpreadNode,
+    GraphQLList,
+    GraphQLObjectType,
+    GraphQLSchema,
+    InlineFragmentNode,
+    SelectionSetNode,
+    get_named_type,
+    get_nullable_type,
+    value_from_ast_untyped,
+)
+from graphql.utilities import get_operation_ast
+from ..core.config import settings
+
+ARGUMENTOS_PAGINA = ("limit", "first")
+
+
+@dataclass
+class QueryCost:
+    cost: int = 0
+    depth: int = 0
+    aliases: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return {"requested": self.cost, "depth": self.depth, "aliases": self.aliases}
+
+
+class _LimiteExcedido(Exception):
+    """Interrumpe el análisis en cuanto la operación supera uno de los límites."""
+
+
+class _CostVisitor:
+    def __init__(
+            self,
+            schema: GraphQLSchema,
+            document: DocumentNode,
+            variables: Optional[Dict[str, Any]],
+            max_cost: Optional[int] = None,
+            max_depth: Optional[int] = None,
+            max_aliases: Optional[int] = None
+    ):
+        self.schema = schema
+        self.variables = variables or {}
+        self.fragments = {
+            d.name.value: d for d in document.definitions if isinstance(d, FragmentDefinitionNode)
+        }
+        self.max_cost = max_cost
+        self.max_depth = max_depth
+        self.max_aliases = max_aliases
+        self.campos = 0
+        self.resultado = QueryCost()
+
+    def _page_size(self, field: FieldNode) -> Optional[int]:
+        for argumento in field.arguments or ():
+            if argumento.name.value in ARGUMENTOS_PAGINA:
+                valor = value_from_ast_untyped(argumento.value, self.variables)
+                if valor is None:
+                    return settings.DEFAULT_LIMIT
+                try:
+                    return max(1, min(int(valor), settings.MAX_LIMIT))
+                except (TypeError, ValueError):
+                    return settings.MAX_LIMIT
+        return None
+
+    def selection_set(
+            self,
+            selection_set: Optional[SelectionSetNode],
+            parent_type: Any,
+            depth: int,
+            page_size: Optional[int],
+            visitados: Optional[Set[str]] = None
+    ) -> int:
+        if selection_set is None:
+            return 0
+
+        # Fragmentos ya expandidos en este conjunto de selección (incluye los anidados)
+        visitados = set() if visitados is None else visitados
+        total = 0
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                total += self.field(selection, parent_type, depth, page_size)
+            elif isinstance(selection, InlineFragmentNode):
+                tipo = (
+                    self.schema.get_type(selection.type_condition.name.value)
+                    if selection.type_condition else parent_type
+                )
+                total += self.selection_set(selection.selection_set, tipo, depth, page_size, visitados)
+            elif isinstance(selection, FragmentSpreadNode):
+                nombre = selection.name.value
+                fragmento = self.fragments.get(nombre)
+                if fragmento is not None and nombre not in visitados:
+                    visitados.add(nombre)
+                    tipo = self.schema.get_type(fragmento.type_condition.name.value)
+                    total += self.selection_set(fragmento.selection_set, tipo, depth, page_size, visitados)
+        return total
+
+    def field(self, field: FieldNode, parent_type: Any, depth: int, page_size: Optional[int]) -> int:
+        nombre = field.name.value
+        if nombre.startswith("__"):
+            return 0
+
+        if field.alias is not None:
+            self.resultado.aliases += 1
+        depth += 1
+        self.resultado.depth = max(self.resultado.depth, depth)
+        self.campos += 1
+        if (
+                (self.max_depth is not None and depth > self.max_depth)
+                or (self.max_aliases is not None and self.resultado.aliases > self.max_aliases)
+                or (self.max_cost is not None and self.campos > self.max_cost)
+        ):
+            raise _LimiteExcedido()
+
+        definicion = parent_type.fields.get(nombre) if isinstance(parent_type, GraphQLObjectType) else None
+        if definicion is None:
+            return 1
+
+        page_size = self._page_size(field) or page_size
+        hijos = self.selection_set(field.selection_set, get_named_type(definicion.type), depth, page_size)
+
+        if isinstance(get_nullable_type(definicion.type), GraphQLList):
+            hijos *= page_size or settings.DEFAULT_LIMIT
+        return 1 + hijos
+
+
+def analyze_cost(
+        schema: GraphQLSchema,
+        document: DocumentNode,
+        operation_name: Optional[str] = None,
+        variables: Optional[Dict[str, Any]] = None,
+        *,
+        max_cost: Optional[int] = None,
+        max_depth: Optional[int] = None,
+        max_aliases: Optional[int] = None
+) -> QueryCost:
+    """
+    Calcula costo, profundidad y número de alias de la operación a ejecutar.
+
+    Si se supera alguno de los límites indicados el análisis se detiene: el resultado
+    supera ese límite y `cost` es una cota inferior (los campos recorridos).
+    """
+    operacion = get_operation_ast(document, operation_name)
+    if operacion is None:
+        return QueryCost()
+
+    visitor = _CostVisitor(schema, document, variables, max_cost, max_depth, max_aliases)
+    root_type = schema.get_root_type(operacion.operation)
+    try:
+        visitor.resultado.cost = visitor.selection_set(operacion.selection_set, root_type, 0, None)
+    except _LimiteExcedido:
+        visitor.resultado.cost = visitor.campos
+    return visitor.resultado
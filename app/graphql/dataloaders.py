@@ -0,0 +1,55 @@
+from dataclasses import dataclass, field
+from typing import FrozenSet, List, Optional, Sequence, Tuple
+from strawberry.dataloader import DataLoader
+from ..core.database import run_db
+from ..services import registro as registro_service
+from .schemas import Registro
+
+# Clave del loader de registros: (id, columnas solicitadas); None = todas las columnas
+ClaveRegistro = Tuple[int, Optional[FrozenSet[str]]]
+
+
+def _union_columnas(claves: Sequence[ClaveRegistro]) -> Optional[List[str]]:
+    """Columnas que cubren todas las búsquedas del lote (None si alguna pide todas)."""
+    union = {"id"}
+    for _, columnas in claves:
+        if columnas is None:
+            return None
+        union |= columnas
+    return sorted(union)
+
+
+async def load_registros(claves: List[ClaveRegistro]) -> List[Optional[Registro]]:
+    """
+    Carga en lote los registros solicitados durante un mismo tick de ejecución.
+
+    Todas las búsquedas del tick se resuelven con una sola consulta `IN` que lee la
+    unión de las columnas pedidas. Devuelve los resultados en el mismo orden que
+    `claves` y None para los IDs inexistentes.
+    """
+    ids = list(dict.fromkeys(registro_id for registro_id, _ in claves))
+    registros = await run_db(registro_service.obtener_por_ids, ids, _union_columnas(claves))
+    por_id = {r.id: Registro.from_model(r) for r in registros}
+    return [por_id.get(registro_id) for registro_id, _ in claves]
+
+
+def _registro_loader() -> DataLoader[ClaveRegistro, Optional[Registro]]:
+    # La caché distingue las columnas: un registro cargado con menos columnas no
+    # debe servir a una búsqueda posterior que pide otras
+    return DataLoader(load_fn=load_registros, max_batch_size=registro_service.MAX_PARAMETROS_IN)
+
+
+@dataclass
+class Loaders:
+    """DataLoaders de una petición. Se crean de nuevo en cada contexto GraphQL."""
+    registro: DataLoader[ClaveRegistro, Optional[Registro]] = field(default_factory=_registro_loader)
+
+    async def cargar_registro(self, registro_id: int, columnas: Optional[Sequence[str]] = None) -> Optional[Registro]:
+        """
+        Carga un registro leyendo solo las columnas indicadas (siempre incluye `id`).
+
+        Las búsquedas del mismo tick comparten un único lote aunque pidan columnas
+        distintas; None lee todas las columnas.
+        """
+        clave = None if columnas is None else frozenset(columnas) | {"id"}
+        return await self.registro.load((registro_id, clave))
@@ -0,0 +1,289 @@
+import logging
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Tuple
+from graphql import DocumentNode, GraphQLError
+from strawberry.extensions import FieldExtension, SchemaExtension
+from slowapi.util import get_remote_address
+from starlette.concurrency import run_in_threadpool
+from strawberry.types import ExecutionResult
+from ..core import metrics, server_timing, sql_stats
+from ..core.config import settings
+from ..core.rate_limit import graphql_limit, graphql_rate_limiter
+from ..utils.cache import LRUCache
+from .cost import QueryCost, analyze_cost
+from .persisted_queries import persisted_query_store, query_hash
+
+logger = logging.getLogger(__name__)
+
+# Documento parseado y errores de validación por hash SHA-256 del texto de la consulta
+document_cache: Optional[LRUCache[str, Tuple[DocumentNode, Tuple[GraphQLError, ...]]]] = (
+    LRUCache(settings.GRAPHQL_DOCUMENT_CACHE_SIZE) if settings.GRAPHQL_DOCUMENT_CACHE_SIZE > 0 else None
+)
+
+
+class DocumentCache(SchemaExtension):
+    """
+    Reutiliza el AST y el resultado de validación de documentos ya vistos.
+
+    En un acierto Strawberry no vuelve a parsear ni a validar (el documento queda en
+    `graphql_document` y los errores en `errors`), y la ejecución empieza directamente.
+    """
+
+    def __init__(self, *, execution_context=None):
+        super().__init__(execution_context=execution_context)
+        self._key: Optional[str] = None
+        self._cached_errors: Optional[Tuple[GraphQLError, ...]] = None
+
+    def on_parse(self) -> Iterator[None]:
+        execution_context = self.execution_context
+        if document_cache is not None and execution_context.query:
+            self._key = query_hash(execution_context.query)
+            entry = document_cache.get(self._key)
+            metrics.GRAPHQL_CACHE_LOOKUPS.labels("document", "miss" if entry is None else "hit").inc()
+            if entry is not None:
+                execution_context.graphql_document, self._cached_errors = entry
+        yield
+
+    def on_validate(self) -> Iterator[None]:
+        execution_context = self.execution_context
+        if self._cached_errors is not None:
+            execution_context.errors = list(self._cached_errors)
+            yield
+            return
+
+        yield
+
+        if self._key is not None and execution_context.graphql_document is not None:
+            document_cache.set(
+                self._key,
+                (execution_context.graphql_document, tuple(execution_context.errors or ()))
+            )
+
+
+class QueryCostLimiter(SchemaExtension):
+    """
+    Rechaza antes de ejecutar las operaciones que superan el costo, la profundidad o el
+    número de alias configurados, y expone el costo calculado en `extensions.cost`.
+
+    El costo queda además en el contexto (`query_cost`) para otros componentes.
+    """
+
+    def __init__(self, *, execution_context=None):
+        super().__init__(execution_context=execution_context)
+        self.cost: Optional[QueryCost] = None
+
+    def on_execute(self) -> Iterator[None]:
+        execution_context = self.execution_context
+        self.cost = analyze_cost(
+            execution_context.schema._schema,
+            execution_context.graphql_document,
+            execution_context.operation_name,
+            execution_context.variables,
+            max_cost=settings.GRAPHQL_MAX_COST,
+            max_depth=settings.GRAPHQL_MAX_DEPTH,
+            max_aliases=settings.GRAPHQL_MAX_ALIASES
+        )
+        if isinstance(execution_context.context, dict):
+            execution_context.context["query_cost"] = self.cost
+
+        error = self._check_limits(self.cost)
+        if error is not None:
+            # Con un resultado ya asignado Strawberry omite la ejecución
+            execution_context.result = ExecutionResult(data=None, errors=[error])
+        yield
+
+    @staticmethod
+    def _check_limits(cost: QueryCost) -> Optional[GraphQLError]:
+        if cost.depth > settings.GRAPHQL_MAX_DEPTH:
+            return GraphQLError(
+                f"La consulta excede la profundidad máxima permitida ({cost.depth} > {settings.GRAPHQL_MAX_DEPTH})",
+                extensions={"code": "QUERY_TOO_DEEP", "depth": cost.depth, "maxDepth": settings.GRAPHQL_MAX_DEPTH}
+            )
+        if cost.aliases > settings.GRAPHQL_MAX_ALIASES:
+            return GraphQLError(
+                f"La consulta excede el número máximo de alias ({cost.aliases} > {settings.GRAPHQL_MAX_ALIASES})",
+                extensions={"code": "TOO_MANY_ALIASES", "aliases": cost.aliases, "maxAliases": settings.GRAPHQL_MAX_ALIASES}
+            )
+        if cost.cost > settings.GRAPHQL_MAX_COST:
+            return GraphQLError(
+                f"La consulta excede el costo máximo permitido ({cost.cost} > {settings.GRAPHQL_MAX_COST})",
+                extensions={"code": "QUERY_TOO_COMPLEX", "cost": cost.cost, "maxCost": settings.GRAPHQL_MAX_COST}
+            )
+        return None
+
+    def get_results(self) -> Dict[str, Any]:
+        if self.cost is None:
+            return {}
+        return {"cost": {**self.cost.as_dict(), "maximum": settings.GRAPHQL_MAX_COST}}
+
+
+def _consumir_limite(cliente: str, unidades: int) -> Optional[float]:
+    """Descuenta `unidades` del límite del cliente; si lo excede devuelve cuándo se reinicia."""
+    if graphql_rate_limiter.hit(graphql_limit, "graphql", cliente, cost=unidades):
+        return None
+    return graphql_rate_limiter.get_window_stats(graphql_limit, "graphql", cliente).reset_time
+
+
+class GraphQLRateLimiter(SchemaExtension):
+    """
+    Aplica GRAPHQL_RATE_LIMIT por cliente descontando el costo de cada operación
+    (calculado por QueryCostLimiter, que debe registrarse antes).
+
+    El storage es un archivo SQLite compartido entre procesos: la consulta se hace en
+    el threadpool para que una espera por el bloqueo del archivo no detenga el event loop.
+    """
+
+    async def on_execute(self) -> AsyncIterator[None]:
+        execution_context = self.execution_context
+        context = execution_context.context if isinstance(execution_context.context, dict) else {}
+        cost: Optional[QueryCost] = context.get("query_cost")
+        request = context.get("request")
+
+        if graphql_limit is not None and execution_context.result is None and request is not None:
+            unidades = min(max(1, cost.cost if cost else 1), graphql_limit.amount)
+            reinicio = await run_in_threadpool(_consumir_limite, get_remote_address(request), unidades)
+            if reinicio is not None:
+                if context.get("response") is not None:
+                    context["response"].status_code = 429
+                execution_context.result = ExecutionResult(data=None, errors=[GraphQLError(
+                    f"Límite de tasa excedido ({graphql_limit})",
+                    extensions={"code": "RATE_LIMITED", "cost": unidades, "resetAt": reinicio}
+                )])
+        yield
+
+
+class SqlStatsExtension(SchemaExtension):
+    """
+    Cuenta las sentencias SQL de cada operación, detecta formas repetidas (N+1) y
+    aplica SQL_QUERY_BUDGET. Con SQL_STATS_IN_RESPONSE el detalle se devuelve en
+    `extensions.sqlStats`.
+    """
+
+    def __init__(self, *, execution_context=None):
+        super().__init__(execution_context=execution_context)
+        self.stats: Optional[sql_stats.SqlStats] = None
+
+    def on_execute(self) -> Iterator[None]:
+        with sql_stats.track() as stats:
+            self.stats = stats
+            yield
+
+        execution_context = self.execution_context
+        nombre = execution_context.operation_name or "anonymous"
+        repetidas = stats.repeated()
+        if repetidas:
+            logger.warning(
+                "Posible N+1 en la operación %s: %s",
+                nombre, ", ".join(f"{r['count']}x {r['statement'][:120]}" for r in repetidas)
+            )
+        logger.debug("Operación %s: %d sentencias SQL en %.1f ms", nombre, stats.count, stats.duration * 1000)
+
+        presupuesto = settings.SQL_QUERY_BUDGET
+        if presupuesto and stats.count > presupuesto:
+            mensaje = f"La operación ejecutó {stats.count} sentencias SQL (presupuesto: {presupuesto})"
+            if settings.SQL_QUERY_BUDGET_MODE == "error" and execution_context.result is not None:
+                error = GraphQLError(
+                    mensaje,
+                    extensions={"code": "QUERY_BUDGET_EXCEEDED", "queries": stats.count, "budget": presupuesto}
+                )
+                execution_context.result.errors = [*(execution_context.result.errors or ()), error]
+            else:
+                logger.warning("%s en %s", mensaje, nombre)
+
+    def get_results(self) -> Dict[str, Any]:
+        if self.stats is None or not settings.SQL_STATS_IN_RESPONSE:
+            return {}
+        return {"sqlStats": self.stats.as_dict()}
+
+
+class ServerTimingExtension(SchemaExtension):
+    """Añade las fases parse, validate y execute a la cabecera Server-Timing."""
+
+    def _medir(self, fase: str) -> Iterator[None]:
+        inicio = time.perf_counter()
+        yield
+        server_timing.add(fase, time.perf_counter() - inicio)
+
+    def on_parse(self) -> Iterator[None]:
+        yield from self._medir("parse")
+
+    def on_validate(self) -> Iterator[None]:
+        yield from self._medir("validate")
+
+    def on_execute(self) -> Iterator[None]:
+        yield from self._medir("execute")
+
+
+# Nombres de operación configurados que se etiquetan en las métricas
+_OPERACIONES_METRICAS = frozenset(settings.METRICS_OPERATION_NAMES)
+
+
+def _etiqueta_operacion(nombre: Optional[str]) -> str:
+    """
+    Etiqueta Prometheus del nombre de operación.
+
+    El nombre lo elige el cliente, así que solo se usa tal cual si está en la allowlist
+    de APQ o en METRICS_OPERATION_NAMES; cualquier otro se agrupa como "other" para que
+    el número de series no crezca sin límite.
+    """
+    if not nombre:
+        return "anonymous"
+    if nombre in persisted_query_store.operation_names or nombre in _OPERACIONES_METRICAS:
+        return nombre
+    return "other"
+
+
+class PrometheusMetrics(SchemaExtension):
+    """Registra en las métricas Prometheus la duración de cada operación y los errores devueltos."""
+
+    def on_operation(self) -> Iterator[None]:
+        inicio = time.perf_counter()
+        yield
+        execution_context = self.execution_context
+        nombre = _etiqueta_operacion(execution_context.operation_name)
+        try:
+            tipo = execution_context.operation_type.value
+        except Exception:
+            tipo = "unknown"
+
+        metrics.GRAPHQL_OPERATIONS.labels(nombre, tipo).inc()
+        metrics.GRAPHQL_OPERATION_DURATION.labels(nombre, tipo).observe(time.perf_counter() - inicio)
+
+        resultado = execution_context.result
+        for error in (resultado.errors if resultado is not None else None) or execution_context.errors or ():
+            codigo = (error.extensions or {}).get("code")
+            original = getattr(error, "original_error", None)
+            metrics.GRAPHQL_ERRORS.labels(
+                codigo or (type(original).__name__ if original is not None else "GraphQLError")
+            ).inc()
+
+
+class ResolverMetrics(FieldExtension):
+    """
+    Duración del resolver y valor de `success` de su respuesta. Mientras se ejecuta,
+    su nombre queda en `sql_stats.current_resolver()` para el log de sentencias lentas.
+
+    Se aplica solo a los campos raíz (ver resolvers.py), de modo que los campos
+    anidados de la respuesta no pagan ningún costo de instrumentación.
+    """
+
+    @staticmethod
+    def _registrar(campo: str, inicio: float, resultado: Any) -> None:
+        metrics.GRAPHQL_RESOLVER_DURATION.labels(campo).observe(time.perf_counter() - inicio)
+        success = getattr(resultado, "success", None)
+        if success is not None:
+            metrics.GRAPHQL_RESULTS.labels(campo, "true" if success else "false").inc()
+
+    def resolve(self, next_, source, info, **kwargs) -> Any:
+        inicio = time.perf_counter()
+        with sql_stats.resolving(info.field_name):
+            resultado = next_(source, info, **kwargs)
+        self._registrar(info.field_name, inicio, resultado)
+        return resultado
+
+    async def resolve_async(self, next_, source, info, **kwargs) -> Any:
+        inicio = time.perf_counter()
+        with sql_stats.resolving(info.field_name):
+            resultado = await next_(source, info, **kwargs)
+        self._registrar(info.field_name, inicio, resultado)
+        return resultado
@@ -0,0 +1,40 @@
+import base64
+import binascii
+from typing import Optional
+
+from ..core.config import settings
+
+CURSOR_PREFIX = "registro:"
+
+
+def encode_cursor(registro_id: int) -> str:
+    """Codifica el ID de un registro como cursor opaco."""
+    return base64.urlsafe_b64encode(f"{CURSOR_PREFIX}{registro_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> int:
+    """Decodifica un cursor opaco. Lanza ValueError si el cursor no es válido."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Cursor inválido")
+
+    if not raw.startswith(CURSOR_PREFIX):
+        raise ValueError("Cursor inválido")
+
+    try:
+        return int(raw[len(CURSOR_PREFIX):])
+    except ValueError:
+        raise ValueError("Cursor inválido")
+
+
+def clamp_limit(limit: Optional[int]) -> int:
+    """Ajusta el límite solicitado al rango [1, MAX_LIMIT]."""
+    if limit is None:
+        return settings.DEFAULT_LIMIT
+    return max(1, min(limit, settings.MAX_LIMIT))
+
+
+def clamp_skip(skip: Optional[int]) -> int:
+    """Evita desplazamientos negativos."""
+    return max(0, skip or 0)
@@ -0,0 +1,123 @@
+"""
+Automatic Persisted Queries (APQ).
+
+El cliente envía `extensions.persistedQuery.sha256Hash` en lugar del documento. Si el
+hash no está registrado se responde `PersistedQueryNotFound` y el cliente reintenta
+enviando el documento completo junto con el hash, que queda registrado.
+"""
+import hashlib
+import json
+import logging
+from typing import Any, Dict, Mapping, Optional, Set
+from graphql import OperationDefinitionNode, parse
+from ..core import metrics
+from ..core.config import settings
+from ..utils.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+APQ_VERSION = 1
+
+
+class PersistedQueryNotFound(Exception):
+    """El hash no está registrado; el cliente debe reenviar el documento."""
+
+
+class PersistedQueryError(Exception):
+    """Extensión persistedQuery inválida (versión no soportada o hash que no coincide)."""
+
+
+def query_hash(query: str) -> str:
+    return hashlib.sha256(query.encode("utf-8")).hexdigest()
+
+
+class PersistedQueryStore:
+    """
+    Documentos registrados por hash.
+
+    Los registrados por clientes se guardan en una LRU acotada; los de la allowlist
+    (cargada al iniciar) se mantienen siempre. `operation_names` contiene los nombres
+    de las operaciones definidas en la allowlist.
+    """
+
+    def __init__(self, maxsize: int, allowlist_path: Optional[str] = None):
+        self._cache: LRUCache[str, str] = LRUCache(maxsize)
+        self._allowlist: Dict[str, str] = {}
+        self.operation_names: Set[str] = set()
+        if allowlist_path:
+            self.load_allowlist(allowlist_path)
+
+    def load_allowlist(self, path: str) -> None:
+        """
+        Carga un archivo JSON con un objeto {hash: documento} o una lista de documentos.
+
+        Los hashes declarados se verifican contra el documento.
+        """
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+
+        documentos = data.values() if isinstance(data, dict) else data
+        for documento in documentos:
+            self._allowlist[query_hash(documento)] = documento
+            self.operation_names.update(
+                definicion.name.value for definicion in parse(documento).definitions
+                if isinstance(definicion, OperationDefinitionNode) and definicion.name
+            )
+
+        if isinstance(data, dict):
+            invalidos = [h for h, documento in data.items() if query_hash(documento) != h]
+            if invalidos:
+                raise ValueError(f"Hashes de la allowlist que no coinciden con su documento: {invalidos}")
+
+        logger.info("Allowlist de consultas persistidas cargada: %d documentos", len(self._allowlist))
+
+    def get(self, sha256_hash: str) -> Optional[str]:
+        return self._allowlist.get(sha256_hash) or self._cache.get(sha256_hash)
+
+    def register(self, sha256_hash: str, query: str) -> None:
+        if sha256_hash not in self._allowlist:
+            self._cache.set(sha256_hash, query)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._cache.stats(), "allowlist": len(self._allowlist)}
+
+
+def resolve_persisted_query(
+        store: PersistedQueryStore,
+        query: Optional[str],
+        extensions: Optional[Mapping[str, Any]]
+) -> Optional[str]:
+    """
+    Devuelve el documento a ejecutar según la extensión persistedQuery.
+
+    Sin la extensión devuelve `query` tal cual.
+    """
+    persisted = (extensions or {}).get("persistedQuery")
+    if not persisted:
+        return query
+
+    if not isinstance(persisted, Mapping) or persisted.get("version") != APQ_VERSION:
+        raise PersistedQueryError("PersistedQueryNotSupported")
+
+    sha256_hash = persisted.get("sha256Hash")
+    if not isinstance(sha256_hash, str):
+        raise PersistedQueryError("persistedQuery.sha256Hash es obligatorio")
+
+    if query is None:
+        documento = store.get(sha256_hash)
+        metrics.GRAPHQL_CACHE_LOOKUPS.labels("apq", "miss" if documento is None else "hit").inc()
+        if documento is None:
+            raise PersistedQueryNotFound()
+        return documento
+
+    if query_hash(query) != sha256_hash:
+        raise PersistedQueryError("provided sha does not match query")
+
+    store.register(sha256_hash, query)
+    return query
+
+
+persisted_query_store = PersistedQueryStore(
+    maxsize=settings.APQ_CACHE_SIZE,
+    allowlist_path=settings.APQ_ALLOWLIST_PATH
+)
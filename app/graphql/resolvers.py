@@ -1,48 +1,60 @@
 import strawberry
-from typing import List, Optional
+from typing import Annotated, List, Optional
+from fastapi import HTTPException
 from strawberry.types import Info
-from sqlalchemy.orm import Session
-from ..core.database import get_db
-from ..models.registro import Registro as RegistroModel
-from ..exceptions import NotFoundException, BadRequestException
+from ..core.database import run_db
+from ..services import registro as registro_service
 from .schemas import (
-    Registro, RegistroInput, RegistroUpdateInput,
-    RegistroResponse, RegistroListResponse
+    Registro, RegistroInput, RegistroUpdateInput, RegistroBatchUpdateInput,
+    RegistroResponse, RegistroListResponse,
+    RegistroConnection, RegistroEdge, PageInfo,
+    RegistroBatchResponse, RegistroBatchError
 )
+from .pagination import encode_cursor, decode_cursor, clamp_limit, clamp_skip
+from .selection import is_selected, registro_columns
+from .extensions import ResolverMetrics
 
 
-def get_db_session():
-    """Obtener sesión de base de datos para GraphQL"""
-    return next(get_db())
+def _batch_response(resultado: registro_service.ResultadoLote, accion: str) -> RegistroBatchResponse:
+    """Convierte el resultado de una operación en lote del servicio al tipo GraphQL"""
+    return RegistroBatchResponse(
+        success=not resultado.errores,
+        message=f"{resultado.total} registros {accion}, {len(resultado.errores)} con errores",
+        registros=[Registro.from_model(r) for r in resultado.registros],
+        errors=[
+            RegistroBatchError(index=e.indice, message=e.mensaje, id=e.id, documento=e.documento)
+            for e in resultado.errores
+        ],
+        total=resultado.total
+    )
 
 
 @strawberry.type
 class Query:
-    @strawberry.field
-    def registros(
+    @strawberry.field(extensions=[ResolverMetrics()])
+    async def registros(
             self,
             info: Info,
             skip: int = 0,
             limit: int = 100
     ) -> RegistroListResponse:
         """Obtener lista de registros"""
-        db = get_db_session()
+        skip = clamp_skip(skip)
+        limit = clamp_limit(limit)
+        # Solo se leen las columnas pedidas y el COUNT se omite si no se pidió `total`
+        columnas = registro_columns(info, "registros") or []
+        contar = is_selected(info, "total")
         try:
-            registros = db.query(RegistroModel).order_by(RegistroModel.id).offset(skip).limit(limit).all()
-            total = db.query(RegistroModel).count()
+            registros, total, total_is_exact = await run_db(
+                registro_service.listar, skip, limit, columnas, contar
+            )
 
             return RegistroListResponse(
                 success=True,
                 message="Registros obtenidos exitosamente",
-                registros=[
-                    Registro(
-                        id=r.id,
-                        documento=r.documento,
-                        nombre=r.nombre,
-                        fecha_creacion=r.fecha_creacion
-                    ) for r in registros
-                ],
-                total=total
+                registros=[Registro.from_model(r) for r in registros],
+                total=total,
+                total_is_exact=total_is_exact
             )
         except Exception as e:
             return RegistroListResponse(
@@ -51,15 +63,60 @@ class Query:
                 registros=[],
                 total=0
             )
-        finally:
-            db.close()
 
-    @strawberry.field
-    def registro(self, info: Info, id: int) -> RegistroResponse:
+    @strawberry.field(extensions=[ResolverMetrics()])
+    async def registros_connection(
+            self,
+            info: Info,
+            first: Optional[int] = None,
+            after: Optional[str] = None
+    ) -> RegistroConnection:
+        """Obtener registros paginados por cursor (keyset sobre el ID)"""
+        first = clamp_limit(first)
+        vacio = PageInfo(has_next_page=False, has_previous_page=after is not None)
+
+        try:
+            after_id = decode_cursor(after) if after is not None else None
+        except ValueError as e:
+            return RegistroConnection(success=False, message=str(e), edges=[], page_info=vacio)
+
+        try:
+            # Se pide una fila extra para saber si existe una página siguiente
+            columnas = registro_columns(info, "edges", "node") or ["id"]
+            registros = await run_db(registro_service.listar_despues_de, after_id, first + 1, columnas)
+            has_next_page = len(registros) > first
+            registros = registros[:first]
+
+            edges = [
+                RegistroEdge(cursor=encode_cursor(r.id), node=Registro.from_model(r))
+                for r in registros
+            ]
+
+            return RegistroConnection(
+                success=True,
+                message="Registros obtenidos exitosamente",
+                edges=edges,
+                page_info=PageInfo(
+                    has_next_page=has_next_page,
+                    has_previous_page=after_id is not None,
+                    start_cursor=edges[0].cursor if edges else None,
+                    end_cursor=edges[-1].cursor if edges else None
+                )
+            )
+        except Exception as e:
+            return RegistroConnection(
+                success=False,
+                message=f"Error al obtener registros: {str(e)}",
+                edges=[],
+                page_info=vacio
+            )
+
+    @strawberry.field(extensions=[ResolverMetrics()])
+    async def registro(self, info: Info, id: int) -> RegistroResponse:
         """Obtener un registro por ID"""
-        db = get_db_session()
         try:
-            registro = db.query(RegistroModel).filter(RegistroModel.id == id).first()
+            columnas = registro_columns(info, "registro") or ["id"]
+            registro = await info.context["loaders"].cargar_registro(id, columnas)
             if not registro:
                 return RegistroResponse(
                     success=False,
@@ -70,12 +127,7 @@ class Query:
             return RegistroResponse(
                 success=True,
                 message="Registro encontrado",
-                registro=Registro(
-                    id=registro.id,
-                    documento=registro.documento,
-                    nombre=registro.nombre,
-                    fecha_creacion=registro.fecha_creacion
-                )
+                registro=registro
             )
         except Exception as e:
             return RegistroResponse(
@@ -83,189 +135,206 @@ class Query:
                 message=f"Error al obtener registro: {str(e)}",
                 registro=None
             )
-        finally:
-            db.close()
 
 
 @strawberry.type
 class Mutation:
-    @strawberry.field
-    def crear_registro(
+    @strawberry.field(extensions=[ResolverMetrics()])
+    async def crear_registro(
             self,
             info: Info,
             registro_input: RegistroInput
     ) -> RegistroResponse:
         """Crear un nuevo registro"""
-        db = get_db_session()
         try:
-            # Validación básica
-            if registro_input.documento <= 0:
-                return RegistroResponse(
-                    success=False,
-                    message="El documento debe ser un número positivo",
-                    registro=None
-                )
+            nuevo_registro = await run_db(
+                registro_service.crear,
+                registro_input.documento,
+                registro_input.nombre
+            )
 
-            if len(registro_input.nombre) < 2:
-                return RegistroResponse(
-                    success=False,
-                    message="El nombre debe tener al menos 2 caracteres",
-                    registro=None
-                )
+            return RegistroResponse(
+                success=True,
+                message="Registro creado exitosamente",
+                registro=Registro.from_model(nuevo_registro)
+            )
 
-            # Verificar si el documento ya existe
-            existe = db.query(RegistroModel).filter(RegistroModel.documento == registro_input.documento).first()
-            if existe:
-                return RegistroResponse(
-                    success=False,
-                    message="Ya existe un registro con ese documento",
-                    registro=None
-                )
+        except HTTPException as e:
+            return RegistroResponse(success=False, message=e.detail, registro=None)
+        except Exception as e:
+            return RegistroResponse(
+                success=False,
+                message=f"Error al crear registro: {str(e)}",
+                registro=None
+            )
 
-            # Crear registro
-            nuevo_registro = RegistroModel(
-                documento=registro_input.documento,
-                nombre=registro_input.nombre
+    @strawberry.field(extensions=[ResolverMetrics()])
+    async def crear_registros(
+            self,
+            info: Info,
+            registros_input: Annotated[List[RegistroInput], strawberry.argument(name="input")]
+    ) -> RegistroBatchResponse:
+        """Crear varios registros en lote"""
+        try:
+            resultado = await run_db(
+                registro_service.crear_en_lote,
+                [(r.documento, r.nombre) for r in registros_input],
+                devolver_creados=is_selected(info, "registros")
+            )
+            return _batch_response(resultado, "creados")
+        except Exception as e:
+            return RegistroBatchResponse(
+                success=False,
+                message=f"Error al crear registros: {str(e)}",
+                registros=[],
+                errors=[],
+                total=0
             )
 
-            db.add(nuevo_registro)
-            db.commit()
-            db.refresh(nuevo_registro)
+    @strawberry.field(extensions=[ResolverMetrics()])
+    async def upsert_registro(
+            self,
+            info: Info,
+            registro_input: RegistroInput
+    ) -> RegistroResponse:
+        """Crear el registro o actualizar su nombre si el documento ya existe (MERGE / ON CONFLICT)"""
+        try:
+            registro = await run_db(
+                registro_service.upsert,
+                registro_input.documento,
+                registro_input.nombre
+            )
 
             return RegistroResponse(
                 success=True,
-                message="Registro creado exitosamente",
-                registro=Registro(
-                    id=nuevo_registro.id,
-                    documento=nuevo_registro.documento,
-                    nombre=nuevo_registro.nombre,
-                    fecha_creacion=nuevo_registro.fecha_creacion
-                )
+                message="Registro guardado exitosamente",
+                registro=Registro.from_model(registro)
             )
 
+        except HTTPException as e:
+            return RegistroResponse(success=False, message=e.detail, registro=None)
         except Exception as e:
-            db.rollback()
             return RegistroResponse(
                 success=False,
-                message=f"Error al crear registro: {str(e)}",
+                message=f"Error al guardar registro: {str(e)}",
                 registro=None
             )
-        finally:
-            db.close()
 
-    @strawberry.field
-    def actualizar_registro(
+    @strawberry.field(extensions=[ResolverMetrics()])
+    async def upsert_registros(
+            self,
+            info: Info,
+            registros_input: Annotated[List[RegistroInput], strawberry.argument(name="input")]
+    ) -> RegistroBatchResponse:
+        """Crear o actualizar varios registros por documento"""
+        try:
+            resultado = await run_db(
+                registro_service.upsert_en_lote,
+                [(r.documento, r.nombre) for r in registros_input]
+            )
+            return _batch_response(resultado, "guardados")
+        except Exception as e:
+            return RegistroBatchResponse(
+                success=False,
+                message=f"Error al guardar registros: {str(e)}",
+                registros=[],
+                errors=[],
+                total=0
+            )
+
+    @strawberry.field(extensions=[ResolverMetrics()])
+    async def actualizar_registro(
             self,
             info: Info,
             id: int,
             registro_input: RegistroUpdateInput
     ) -> RegistroResponse:
         """Actualizar un registro existente"""
-        db = get_db_session()
         try:
-            registro = db.query(RegistroModel).filter(RegistroModel.id == id).first()
-            if not registro:
-                return RegistroResponse(
-                    success=False,
-                    message="Registro no encontrado",
-                    registro=None
-                )
-
-            # Actualizar campos si se proporcionan
-            if registro_input.documento is not None:
-                if registro_input.documento <= 0:
-                    return RegistroResponse(
-                        success=False,
-                        message="El documento debe ser un número positivo",
-                        registro=None
-                    )
-
-                # Verificar si el nuevo documento ya existe en otro registro
-                existe = db.query(RegistroModel).filter(
-                    RegistroModel.documento == registro_input.documento,
-                    RegistroModel.id != id
-                ).first()
-                if existe:
-                    return RegistroResponse(
-                        success=False,
-                        message="Ya existe otro registro con ese documento",
-                        registro=None
-                    )
-
-                registro.documento = registro_input.documento
-
-            if registro_input.nombre is not None:
-                if len(registro_input.nombre) < 2:
-                    return RegistroResponse(
-                        success=False,
-                        message="El nombre debe tener al menos 2 caracteres",
-                        registro=None
-                    )
-                registro.nombre = registro_input.nombre
-
-            db.commit()
-            db.refresh(registro)
+            registro = await run_db(
+                registro_service.actualizar,
+                id,
+                registro_input.documento,
+                registro_input.nombre
+            )
 
             return RegistroResponse(
                 success=True,
                 message="Registro actualizado exitosamente",
-                registro=Registro(
-                    id=registro.id,
-                    documento=registro.documento,
-                    nombre=registro.nombre,
-                    fecha_creacion=registro.fecha_creacion
-                )
+                registro=Registro.from_model(registro)
             )
 
+        except HTTPException as e:
+            return RegistroResponse(success=False, message=e.detail, registro=None)
         except Exception as e:
-            db.rollback()
             return RegistroResponse(
                 success=False,
                 message=f"Error al actualizar registro: {str(e)}",
                 registro=None
             )
-        finally:
-            db.close()
 
-    @strawberry.field
-    def eliminar_registro(
+    @strawberry.field(extensions=[ResolverMetrics()])
+    async def actualizar_registros(
+            self,
+            info: Info,
+            registros_input: Annotated[List[RegistroBatchUpdateInput], strawberry.argument(name="input")]
+    ) -> RegistroBatchResponse:
+        """Actualizar varios registros en una sola transacción"""
+        try:
+            resultado = await run_db(
+                registro_service.actualizar_en_lote,
+                [(r.id, r.documento, r.nombre) for r in registros_input]
+            )
+            return _batch_response(resultado, "actualizados")
+        except Exception as e:
+            return RegistroBatchResponse(
+                success=False,
+                message=f"Error al actualizar registros: {str(e)}",
+                registros=[],
+                errors=[],
+                total=0
+            )
+
+    @strawberry.field(extensions=[ResolverMetrics()])
+    async def eliminar_registro(
             self,
             info: Info,
             id: int
     ) -> RegistroResponse:
         """Eliminar un registro"""
-        db = get_db_session()
         try:
-            registro = db.query(RegistroModel).filter(RegistroModel.id == id).first()
-            if not registro:
-                return RegistroResponse(
-                    success=False,
-                    message="Registro no encontrado",
-                    registro=None
-                )
-
-            registro_eliminado = Registro(
-                id=registro.id,
-                documento=registro.documento,
-                nombre=registro.nombre,
-                fecha_creacion=registro.fecha_creacion
-            )
-
-            db.delete(registro)
-            db.commit()
+            registro = await run_db(registro_service.eliminar, id)
 
             return RegistroResponse(
                 success=True,
                 message="Registro eliminado exitosamente",
-                registro=registro_eliminado
+                registro=Registro.from_model(registro)
             )
 
+        except HTTPException as e:
+            return RegistroResponse(success=False, message=e.detail, registro=None)
         except Exception as e:
-            db.rollback()
             return RegistroResponse(
                 success=False,
                 message=f"Error al eliminar registro: {str(e)}",
                 registro=None
             )
-        finally:
-            db.close()
\ No newline at end of file
+
+    @strawberry.field(extensions=[ResolverMetrics()])
+    async def eliminar_registros(
+            self,
+            info: Info,
+            ids: List[int]
+    ) -> RegistroBatchResponse:
+        """Eliminar varios registros"""
+        try:
+            resultado = await run_db(registro_service.eliminar_en_lote, ids)
+            return _batch_response(resultado, "eliminados")
+        except Exception as e:
+            return RegistroBatchResponse(
+                success=False,
+                message=f"Error al eliminar registros: {str(e)}",
+                registros=[],
+                errors=[],
+                total=0
+            )
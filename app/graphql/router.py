@@ -0,0 +1,58 @@
+import time
+from typing import Any, Optional
+from graphql import GraphQLError
+from strawberry.fastapi import GraphQLRouter as StrawberryGraphQLRouter
+from strawberry.http import GraphQLRequestData
+from strawberry.types import ExecutionResult
+from ..core import server_timing
+from ..core.config import settings
+from .persisted_queries import (
+    PersistedQueryError,
+    PersistedQueryNotFound,
+    persisted_query_store,
+    resolve_persisted_query,
+)
+
+
+class GraphQLRouter(StrawberryGraphQLRouter):
+    """
+    GraphQLRouter de Strawberry con soporte para Automatic Persisted Queries (APQ).
+
+    También mide la serialización de la respuesta para la cabecera Server-Timing.
+    """
+
+    def __init__(self, *args: Any, persisted_queries: Optional[bool] = None, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.persisted_queries = settings.APQ_ENABLED if persisted_queries is None else persisted_queries
+
+    def should_render_graphql_ide(self, request) -> bool:
+        # Un GET que solo trae el hash (?extensions=...) es una consulta, no GraphiQL
+        if request.query_params.get("extensions"):
+            return False
+        return super().should_render_graphql_ide(request)
+
+    async def parse_http_body(self, request) -> GraphQLRequestData:
+        request_data = await super().parse_http_body(request)
+        if self.persisted_queries and request_data.extensions:
+            request_data.query = resolve_persisted_query(
+                persisted_query_store, request_data.query, request_data.extensions
+            )
+        return request_data
+
+    def encode_json(self, data: object) -> str:
+        inicio = time.perf_counter()
+        contenido = super().encode_json(data)
+        server_timing.add("serialize", time.perf_counter() - inicio)
+        return contenido
+
+    async def execute_operation(self, request, context, root_value):
+        try:
+            return await super().execute_operation(request, context, root_value)
+        except PersistedQueryNotFound:
+            return _error_result("PersistedQueryNotFound", "PERSISTED_QUERY_NOT_FOUND")
+        except PersistedQueryError as e:
+            return _error_result(str(e), "PERSISTED_QUERY_ERROR")
+
+
+def _error_result(message: str, code: str) -> ExecutionResult:
+    return ExecutionResult(data=None, errors=[GraphQLError(message, extensions={"code": code})])
@@ -9,6 +9,21 @@ class Registro:
     nombre: str
     fecha_creacion: datetime
 
+    @classmethod
+    def from_model(cls, registro) -> "Registro":
+        """
+        Construye el tipo GraphQL a partir de un modelo (o fila) de registro.
+
+        Las filas proyectadas pueden no traer todas las columnas; los campos ausentes
+        quedan en None porque no fueron solicitados en la consulta.
+        """
+        return cls(
+            id=registro.id,
+            documento=getattr(registro, "documento", None),
+            nombre=getattr(registro, "nombre", None),
+            fecha_creacion=getattr(registro, "fecha_creacion", None)
+        )
+
 @strawberry.input
 class RegistroInput:
     documento: int
@@ -19,6 +34,12 @@ class RegistroUpdateInput:
     documento: Optional[int] = None
     nombre: Optional[str] = None
 
+@strawberry.input
+class RegistroBatchUpdateInput:
+    id: int
+    documento: Optional[int] = None
+    nombre: Optional[str] = None
+
 @strawberry.type
 class RegistroResponse:
     success: bool
@@ -30,4 +51,39 @@ class RegistroListResponse:
     success: bool
     message: str
     registros: List[Registro]
-    total: int
\ No newline at end of file
+    total: int
+    total_is_exact: bool = True
+
+@strawberry.type
+class PageInfo:
+    has_next_page: bool
+    has_previous_page: bool
+    start_cursor: Optional[str] = None
+    end_cursor: Optional[str] = None
+
+@strawberry.type
+class RegistroEdge:
+    cursor: str
+    node: Registro
+
+@strawberry.type
+class RegistroConnection:
+    success: bool
+    message: str
+    edges: List[RegistroEdge]
+    page_info: PageInfo
+
+@strawberry.type
+class RegistroBatchError:
+    index: int
+    message: str
+    id: Optional[int] = None
+    documento: Optional[int] = None
+
+@strawberry.type
+class RegistroBatchResponse:
+    success: bool
+    message: str
+    registros: List[Registro]
+    errors: List[RegistroBatchError]
+    total: int
@@ -0,0 +1,59 @@
+from typing import Iterable, List, Optional, Set
+from strawberry.types import Info
+from strawberry.types.nodes import Selection, SelectedField
+
+# Campos GraphQL del tipo Registro -> columnas de la tabla registros
+COLUMNAS_REGISTRO = {
+    "id": "id",
+    "documento": "documento",
+    "nombre": "nombre",
+    "fechaCreacion": "fecha_creacion",
+}
+
+
+def _campos(selections: Iterable[Selection]) -> List[SelectedField]:
+    """Aplana fragmentos e inline fragments y devuelve los campos seleccionados."""
+    campos: List[SelectedField] = []
+    for selection in selections:
+        if isinstance(selection, SelectedField):
+            campos.append(selection)
+        else:
+            campos.extend(_campos(selection.selections))
+    return campos
+
+
+def selected_subfields(info: Info, *path: str) -> Optional[Set[str]]:
+    """
+    Nombres de los campos seleccionados bajo `path`, relativo al campo que se está resolviendo
+    (path vacío = subcampos del campo actual).
+
+    Devuelve None si algún campo del camino no fue seleccionado. Si el mismo campo
+    aparece varias veces (alias, fragmentos) se combinan sus selecciones.
+    """
+    nivel = _campos(s for campo in _campos(info.selected_fields) for s in campo.selections)
+    for nombre in path:
+        hijos = [campo for campo in nivel if campo.name == nombre]
+        if not hijos:
+            return None
+        nivel = _campos(s for campo in hijos for s in campo.selections)
+    return {campo.name for campo in nivel}
+
+
+def is_selected(info: Info, *path: str) -> bool:
+    """Indica si el campo al final de `path` fue seleccionado."""
+    *padre, campo = path
+    seleccion = selected_subfields(info, *padre)
+    return seleccion is not None and campo in seleccion
+
+
+def registro_columns(info: Info, *path: str) -> Optional[List[str]]:
+    """
+    Columnas de `registros` necesarias para los campos de Registro seleccionados bajo `path`.
+
+    Siempre incluye `id`. Devuelve None si el campo de tipo Registro no fue seleccionado.
+    """
+    seleccion = selected_subfields(info, *path)
+    if seleccion is None:
+        return None
+    columnas = {"id"} | {COLUMNAS_REGISTRO[c] for c in seleccion if c in COLUMNAS_REGISTRO}
+    return sorted(columnas)
@@ -1,19 +1,49 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
-from strawberry.fastapi import GraphQLRouter
+from fastapi.responses import HTMLResponse, Response
+from starlette.concurrency import run_in_threadpool
 import time
 
 from .core.config import settings
-from .core.database import engine
-from .models import Base
+from .core.database import async_engine, engine
+from .core.metrics import render_metrics
+from .core.migrations import upgrade
+from .core.pool import keepalive_loop, prewarm, prewarm_async
+from .core import server_timing
+from .core.security import token_cache, user_cache
 from .exceptions import setup_exception_handlers
-from .graphql import schema
+from .services.ultimo_login import ultimo_login
+from .graphql import schema, get_context, GraphQLRouter
+from .graphql.extensions import document_cache
+from .graphql.persisted_queries import persisted_query_store
 # Solo mantener auth si quieres autenticación REST opcional
-from .routers import auth
+from .routers import auth, registros, monitoreo
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Tablas y migraciones pendientes: en producción se aplican con
+    # `python -m app.core.migrations` antes del despliegue, no en cada worker
+    if settings.DB_AUTO_MIGRATE:
+        await run_in_threadpool(upgrade, engine)
+    # Conexiones abiertas antes de atender peticiones: la primera petición tras un
+    # despliegue no paga el connect (TLS y opciones de sesión)
+    if settings.DB_POOL_PREWARM > 0:
+        await run_in_threadpool(prewarm, engine, settings.DB_POOL_PREWARM)
+        if async_engine is not None:
+            await prewarm_async(async_engine, settings.DB_POOL_PREWARM)
+    keepalive = None
+    if settings.DB_POOL_KEEPALIVE_INTERVAL > 0:
+        keepalive = asyncio.create_task(keepalive_loop(engine, async_engine))
+    ultimo_login.start()
+    yield
+    if keepalive is not None:
+        keepalive.cancel()
+    # Vuelca los ultimo_login pendientes antes de salir
+    ultimo_login.stop()
 
-# Inicialización de la base de datos
-Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title=f"{settings.PROJECT_NAME} - GraphQL API",
@@ -21,6 +51,7 @@ app = FastAPI(
     description="API GraphQL para gestión de registros",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 # Configuración de CORS
@@ -32,25 +63,32 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Middleware para logging
+# Middleware de tiempos: desglose por fases en la cabecera Server-Timing
 @app.middleware("http")
-async def add_process_time_header(request: Request, call_next):
-    start_time = time.time()
+async def add_server_timing_header(request: Request, call_next):
+    if not settings.SERVER_TIMING_ENABLED:
+        return await call_next(request)
+    timing = server_timing.start()
     response = await call_next(request)
-    process_time = time.time() - start_time
-    response.headers["X-Process-Time"] = str(process_time)
+    response.headers["Server-Timing"] = timing.header()
     return response
 
 # Configurar manejadores de excepciones
 setup_exception_handlers(app, debug=settings.DEBUG)
 
 # Router GraphQL principal
-graphql_app = GraphQLRouter(schema, graphiql=True)
+graphql_app = GraphQLRouter(schema, graphiql=True, context_getter=get_context)
 app.include_router(graphql_app, prefix="/graphql")
 
 # Opcional: mantener autenticación REST
 app.include_router(auth.router)
 
+# Exportación / importación masiva de registros
+app.include_router(registros.router)
+
+# Estadísticas operativas (pool de conexiones)
+app.include_router(monitoreo.router)
+
 # Página de bienvenida (como la mostré antes)
 @app.get("/", response_class=HTMLResponse)
 async def root():
@@ -187,9 +225,21 @@ async def health_check():
         "status": "online",
         "version": "2.0.0",
         "api_type": "GraphQL",
-        "timestamp": time.time()
+        "timestamp": time.time(),
+        "cache": {
+            "tokens": token_cache.stats(),
+            "usuarios": user_cache.stats(),
+            "documentos": document_cache.stats() if document_cache is not None else None,
+            "apq": persisted_query_store.stats(),
+        }
     }
 
+# Métricas en formato Prometheus
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    contenido, content_type = render_metrics()
+    return Response(content=contenido, media_type=content_type)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=settings.DEBUG)
\ No newline at end of file
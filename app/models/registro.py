@@ -6,5 +6,5 @@ from ..core.database import Base
 class Registro(Base, BaseModel):
     __tablename__ = "registros"
 
-    documento = Column(Integer, nullable=False)
+    documento = Column(Integer, nullable=False, unique=True, index=True)
     nombre = Column(String(100), nullable=False)
\ No newline at end of file
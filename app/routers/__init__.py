@@ -1,7 +1,9 @@
 # app/routers/__init__.py
 from .auth import router as auth_router
+from .registros import router as registros_router
+from .monitoreo import router as monitoreo_router
 
 # Solo exportar auth si lo mantienes para autenticación
-router = [auth_router]
+router = [auth_router, registros_router, monitoreo_router]
 
-__all__ = ["auth"]
\ No newline at end of file
+__all__ = ["auth", "registros", "monitoreo"]
\ No newline at end of file
@@ -1,26 +1,22 @@
 from fastapi import APIRouter, Depends, status, Request
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
-from slowapi import Limiter
-from slowapi.util import get_remote_address
 
-from ..core.database import get_db
+from ..core.database import run_db
 from ..core.config import settings
+from ..core.rate_limit import limiter
 from ..core.security import (
-    verify_password,
-    get_password_hash,
+    verify_password_async,
+    get_password_hash_async,
     create_access_token
 )
 from ..schemas.usuario import UsuarioCreate, Usuario
 from ..schemas.token import Token
-from ..models.usuario import Usuario as UsuarioModel
+from ..services import usuario as usuario_service
+from ..services.ultimo_login import ultimo_login
 from ..exceptions import UnauthorizedException, BadRequestException
 from ..utils.validators import validate_password_strength, validate_username
 
-# Limiter para rate limiting
-limiter = Limiter(key_func=get_remote_address)
-
 router = APIRouter(
     prefix=f"{settings.API_V1_STR}/auth",
     tags=["autenticación"]
@@ -31,8 +27,7 @@ router = APIRouter(
 @limiter.limit("5/minute")
 async def login_for_access_token(
         request: Request,
-        form_data: OAuth2PasswordRequestForm = Depends(),
-        db: Session = Depends(get_db)
+        form_data: OAuth2PasswordRequestForm = Depends()
 ):
     """
     Inicia sesión y genera un token JWT.
@@ -48,10 +43,10 @@ async def login_for_access_token(
         raise BadRequestException("El nombre de usuario y la contraseña son obligatorios")
 
     # Buscar usuario
-    user = db.query(UsuarioModel).filter(UsuarioModel.username == form_data.username).first()
+    user = await run_db(usuario_service.obtener_por_username, form_data.username)
 
     # Verificar usuario y contraseña
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
         raise UnauthorizedException("Usuario o contraseña incorrectos")
 
     # Verificar si el usuario está activo
@@ -65,21 +60,8 @@ async def login_for_access_token(
         expires_delta=access_token_expires
     )
 
-    try:
-        # Actualizar último login
-        db_user = db.query(UsuarioModel).filter(UsuarioModel.id == user.id).first()
-        if db_user:
-            db_user.ultimo_login = datetime.utcnow()
-            db.commit()
-        else:
-            # Si no se encuentra el usuario (esto no debería ocurrir normalmente)
-            # pero simplemente continuamos sin actualizar último_login
-            db.rollback()
-            print(f"ADVERTENCIA: No se pudo actualizar último_login porque el usuario con ID {user.id} no existe.")
-    except Exception as e:
-        db.rollback()
-        print(f"ERROR al actualizar último_login: {str(e)}")
-        # Continuar a pesar del error en la actualización de último_login
+    # Último login: se escribe en segundo plano junto con los de otros usuarios
+    ultimo_login.registrar(user.id, datetime.utcnow())
 
     # Calcular tiempo de expiración para incluirlo en la respuesta
     expires_at = datetime.utcnow() + access_token_expires
@@ -94,8 +76,7 @@ async def login_for_access_token(
 @limiter.limit("3/minute")
 async def registrar_usuario(
         request: Request,
-        usuario: UsuarioCreate,
-        db: Session = Depends(get_db)
+        usuario: UsuarioCreate
 ):
     """
     Registra un nuevo usuario.
@@ -122,28 +103,9 @@ async def registrar_usuario(
     # Para el registro de usuarios normales, no administradores
     usuario.is_admin = True
 
-    # Verificar si el email ya existe
-    if db.query(UsuarioModel).filter(UsuarioModel.email == usuario.email).first():
-        raise BadRequestException("El correo electrónico ya está registrado")
-
-    # Verificar si el username ya existe
-    if db.query(UsuarioModel).filter(UsuarioModel.username == usuario.username).first():
-        raise BadRequestException("El nombre de usuario ya está en uso")
+    # Verificar si el email o el username ya existen
+    await run_db(usuario_service.validar_disponible, usuario.email, usuario.username)
 
     # Crear usuario
-    hashed_password = get_password_hash(usuario.password)
-    db_usuario = UsuarioModel(
-        email=usuario.email,
-        username=usuario.username,
-        hashed_password=hashed_password,
-        nombre=usuario.nombre,
-        apellido=usuario.apellido,
-        is_active=usuario.is_active,
-        is_admin=usuario.is_admin
-    )
-
-    db.add(db_usuario)
-    db.commit()
-    db.refresh(db_usuario)
-
-    return db_usuario
\ No newline at end of file
+    hashed_password = await get_password_hash_async(usuario.password)
+    return await run_db(usuario_service.crear, usuario, hashed_password)
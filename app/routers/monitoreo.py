@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends
+
+from ..core.config import settings
+from ..core.database import engine, async_engine
+from ..core.security import get_current_admin_user
+
+router = APIRouter(
+    prefix=f"{settings.API_V1_STR}/monitoreo",
+    tags=["monitoreo"]
+)
+
+
+@router.get("/pool")
+async def estadisticas_pool(current_user=Depends(get_current_admin_user)):
+    """
+    Estadísticas del pool de conexiones de este worker.
+
+    Incluye conexiones en uso y libres, uso del overflow, espera media y máxima de los
+    checkouts, timeouts e invalidaciones desde el inicio del proceso. Los checkouts del
+    keepalive no se cuentan como de peticiones; aparecen en `keepalive_pings`.
+    """
+    pools = {"sync": engine.pool.stats.snapshot(engine.pool)}
+    if async_engine is not None:
+        pool = async_engine.sync_engine.pool
+        pools["async"] = pool.stats.snapshot(pool)
+    return {
+        "pools": pools,
+        "config": {
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_timeout": settings.DB_POOL_TIMEOUT,
+            "pool_pre_ping": settings.DB_POOL_PRE_PING,
+            "pool_recycle": settings.DB_POOL_RECYCLE,
+            "pool_use_lifo": settings.DB_POOL_USE_LIFO,
+        }
+    }
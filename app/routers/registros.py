@@ -0,0 +1,417 @@
+import codecs
+import csv
+import io
+import json
+import logging
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+
+from ..core.config import settings
+from ..core.database import SessionLocal, run_db
+from ..core.security import get_current_active_user, get_current_admin_user
+from ..models.registro import Registro as RegistroModel
+from ..services import registro as registro_service
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix=f"{settings.API_V1_STR}/registros",
+    tags=["registros"]
+)
+
+COLUMNAS_EXPORTACION = ("id", "documento", "nombre", "fecha_creacion")
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _serializar(valor):
+    return valor.isoformat() if hasattr(valor, "isoformat") else valor
+
+
+def _ndjson(filas: Sequence) -> str:
+    return "".join(
+        json.dumps({c: _serializar(v) for c, v in zip(COLUMNAS_EXPORTACION, fila)}, ensure_ascii=False) + "\n"
+        for fila in filas
+    )
+
+
+def _csv(filas: Sequence) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerows([_serializar(v) for v in fila] for fila in filas)
+    return buffer.getvalue()
+
+
+def generar_exportacion(formato: str) -> Iterator[str]:
+    """
+    Recorre la tabla con un cursor del servidor (stream_results + yield_per) y produce
+    un bloque de texto por cada `EXPORT_CHUNK_SIZE` filas, de modo que la memoria no
+    depende del tamaño de la tabla.
+    """
+    serializar = _csv if formato == "csv" else _ndjson
+    if formato == "csv":
+        yield ",".join(COLUMNAS_EXPORTACION) + "\n"
+
+    tabla = RegistroModel.__table__
+    db = SessionLocal()
+    try:
+        resultado = db.execute(
+            select(*(tabla.c[c] for c in COLUMNAS_EXPORTACION))
+            .order_by(tabla.c.id)
+            .execution_options(stream_results=True, yield_per=settings.EXPORT_CHUNK_SIZE)
+        )
+        for filas in resultado.partitions():
+            yield serializar(filas)
+    finally:
+        db.close()
+
+
+@router.get("/export")
+def exportar_registros(
+        formato: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+        current_user=Depends(get_current_active_user)
+):
+    """
+    Exporta todos los registros en streaming.
+
+    - **format**: `ndjson` (un objeto JSON por línea) o `csv`
+    """
+    return StreamingResponse(
+        generar_exportacion(formato),
+        media_type=MEDIA_TYPES[formato],
+        headers={"Content-Disposition": f'attachment; filename="registros.{formato}"'}
+    )
+
+
+# Resultado de leer una fila del cuerpo: (línea, (documento, nombre) o None, error o None)
+FilaImportada = Tuple[int, Optional[Tuple[int, str]], Optional[str]]
+
+
+async def _textos(request: Request) -> AsyncIterator[str]:
+    """Decodifica el cuerpo a medida que llega, sin bufferizarlo."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    async for chunk in request.stream():
+        texto = decoder.decode(chunk)
+        if texto:
+            yield texto
+    texto = decoder.decode(b"", final=True)
+    if texto:
+        yield texto
+
+
+async def _lineas(request: Request) -> AsyncIterator[Tuple[int, str]]:
+    """Produce (número de línea, línea) a medida que llega el cuerpo."""
+    pendiente = ""
+    numero = 0
+    async for texto in _textos(request):
+        lineas = (pendiente + texto).split("\n")
+        pendiente = lineas.pop()
+        for linea in lineas:
+            numero += 1
+            yield numero, linea.rstrip("\r")
+    if pendiente:
+        yield numero + 1, pendiente.rstrip("\r")
+
+
+# Estados del lexer CSV (dialecto excel: delimitador "," y comillas escapadas como "")
+_INICIO_CAMPO, _SIN_COMILLAS, _EN_COMILLAS, _COMILLA_EN_COMILLAS = range(4)
+
+# Un registro CSV válido es mucho menor (nombre <= 100 caracteres); uno mayor que siga
+# con comillas abiertas se rechaza en lugar de acumularse hasta el final del cuerpo
+MAX_CARACTERES_REGISTRO_CSV = 64 * 1024
+
+
+def _estado_csv(linea: str, estado: int) -> int:
+    """
+    Estado del lexer tras leer `linea`, con las reglas de csv.reader: una comilla solo
+    abre un campo entre comillas al inicio del campo (en `O"Brien` es un carácter más).
+    """
+    if estado != _EN_COMILLAS and '"' not in linea:
+        return _INICIO_CAMPO
+    for caracter in linea:
+        if estado == _EN_COMILLAS:
+            if caracter == '"':
+                estado = _COMILLA_EN_COMILLAS
+        elif caracter == '"' and estado in (_INICIO_CAMPO, _COMILLA_EN_COMILLAS):
+            # Apertura del campo, o "" escapada dentro de él
+            estado = _EN_COMILLAS
+        elif caracter in ",\r\n":
+            estado = _INICIO_CAMPO
+        else:
+            estado = _SIN_COMILLAS
+    return estado
+
+
+class _LineasCsv:
+    """
+    Iterador de líneas para un único csv.reader, que se rellena a medida que llega el cuerpo.
+
+    Solo entrega las líneas de registros completos (el lexer no termina dentro de un
+    campo entre comillas), de modo que el reader nunca se queda sin datos en mitad de un
+    campo con saltos de línea. Un registro que supera MAX_CARACTERES_REGISTRO_CSV sin
+    cerrar sus comillas se descarta y se informa como error en su primera línea.
+    """
+
+    def __init__(self, max_caracteres: Optional[int] = None):
+        self.max_caracteres = max_caracteres or MAX_CARACTERES_REGISTRO_CSV
+        # (número de línea, línea, None) o (número de línea, None, error) listos para leer
+        self._cola: Deque[Tuple[int, Optional[str], Optional[str]]] = deque()
+        self._registro: List[Tuple[int, str]] = []
+        self._caracteres = 0
+        self._estado = _INICIO_CAMPO
+        self._pendiente = ""
+        self._numero = 0
+
+    @property
+    def disponibles(self) -> bool:
+        return bool(self._cola)
+
+    @property
+    def siguiente(self) -> int:
+        """Número de la primera línea del siguiente registro disponible."""
+        return self._cola[0][0]
+
+    def error(self) -> Optional[Tuple[int, str]]:
+        """Extrae el error que haya en la cabeza de la cola (registro descartado)."""
+        if self._cola and self._cola[0][1] is None:
+            numero, _, error = self._cola.popleft()
+            return numero, error
+        return None
+
+    def _cerrar_registro(self) -> None:
+        self._cola.extend((numero, linea, None) for numero, linea in self._registro)
+        self._registro = []
+        self._caracteres = 0
+        self._estado = _INICIO_CAMPO
+
+    def _agregar_linea(self, linea: str) -> None:
+        self._numero += 1
+        self._registro.append((self._numero, linea))
+        self._caracteres += len(linea)
+        self._estado = _estado_csv(linea, self._estado)
+        if self._estado != _EN_COMILLAS:
+            self._cerrar_registro()
+        elif self._caracteres > self.max_caracteres:
+            self._cola.append((
+                self._registro[0][0], None,
+                f"Registro de más de {self.max_caracteres} caracteres con comillas sin cerrar"
+            ))
+            self._registro = []
+            self._caracteres = 0
+            self._estado = _INICIO_CAMPO
+
+    def agregar(self, texto: str) -> None:
+        lineas = (self._pendiente + texto).split("\n")
+        self._pendiente = lineas.pop()
+        for linea in lineas:
+            self._agregar_linea(linea + "\n")
+
+    def cerrar(self) -> None:
+        """Fin del cuerpo: se entrega lo que quede, aunque tenga comillas sin cerrar."""
+        if self._pendiente:
+            self._agregar_linea(self._pendiente)
+            self._pendiente = ""
+        self._cerrar_registro()
+
+    def __iter__(self) -> "_LineasCsv":
+        return self
+
+    def __next__(self) -> str:
+        if not self._cola or self._cola[0][1] is None:
+            raise StopIteration
+        return self._cola.popleft()[1]
+
+
+async def _filas_csv(request: Request) -> AsyncIterator[FilaImportada]:
+    """
+    Filas de un cuerpo CSV leído con un único csv.reader, por lo que admite campos
+    entre comillas con saltos de línea (como los que produce la exportación).
+
+    Con cabecera se localizan las columnas `documento` y `nombre` por nombre (la
+    cabecera de `/export` es válida); sin ella se esperan exactamente esas dos columnas.
+    """
+    lineas = _LineasCsv()
+    reader = csv.reader(lineas)
+    posiciones: Optional[Tuple[int, int]] = None
+    primera = True
+    cerrado = False
+
+    textos = _textos(request).__aiter__()
+    while True:
+        while lineas.disponibles:
+            error = lineas.error()
+            if error is not None:
+                yield error[0], None, error[1]
+                continue
+            inicio = lineas.siguiente
+            try:
+                campos = next(reader)
+            except csv.Error as e:
+                yield inicio, None, f"Línea inválida: {str(e)}"
+                continue
+            if not any(campo.strip() for campo in campos):
+                continue
+
+            if primera:
+                primera = False
+                cabecera = [campo.strip().lower() for campo in campos]
+                if "documento" in cabecera or "nombre" in cabecera:
+                    if "documento" not in cabecera or "nombre" not in cabecera:
+                        yield inicio, None, "La cabecera debe incluir las columnas documento y nombre"
+                        return
+                    posiciones = (cabecera.index("documento"), cabecera.index("nombre"))
+                    continue
+
+            try:
+                if posiciones is None:
+                    if len(campos) != 2:
+                        raise ValueError("Se esperaban 2 columnas: documento,nombre")
+                    documento, nombre = campos
+                else:
+                    documento, nombre = campos[posiciones[0]], campos[posiciones[1]]
+                yield inicio, (int(documento), nombre), None
+            except (ValueError, IndexError) as e:
+                yield inicio, None, f"Línea inválida: {str(e)}"
+
+        if cerrado:
+            return
+        try:
+            lineas.agregar(await textos.__anext__())
+        except StopAsyncIteration:
+            lineas.cerrar()
+            cerrado = True
+
+
+def _parsear_ndjson(linea: str) -> Tuple[int, str]:
+    fila = json.loads(linea)
+    if not isinstance(fila, dict) or "documento" not in fila or "nombre" not in fila:
+        raise ValueError("Se esperaba un objeto con 'documento' y 'nombre'")
+    if not isinstance(fila["documento"], int) or not isinstance(fila["nombre"], str):
+        raise ValueError("'documento' debe ser entero y 'nombre' texto")
+    return fila["documento"], fila["nombre"]
+
+
+async def _filas_ndjson(request: Request) -> AsyncIterator[FilaImportada]:
+    async for numero, linea in _lineas(request):
+        if not linea.strip():
+            continue
+        try:
+            yield numero, _parsear_ndjson(linea), None
+        except ValueError as e:
+            yield numero, None, f"Línea inválida: {str(e)}"
+
+
+class _ResumenImportacion:
+    def __init__(self):
+        self.procesadas = 0
+        self.insertadas = 0
+        self.rechazadas = 0
+        self.rechazos: List[Dict[str, Any]] = []
+
+    def rechazar(self, linea: int, error: str, documento: Optional[int] = None) -> None:
+        self.rechazadas += 1
+        if len(self.rechazos) < settings.IMPORT_MAX_REJECTS:
+            self.rechazos.append({"linea": linea, "documento": documento, "error": error})
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "procesadas": self.procesadas,
+            "insertadas": self.insertadas,
+            "rechazadas": self.rechazadas,
+            "rechazos": self.rechazos,
+            "rechazos_omitidos": self.rechazadas - len(self.rechazos),
+        }
+
+    def progreso(self) -> Dict[str, Any]:
+        return {"procesadas": self.procesadas, "insertadas": self.insertadas, "rechazadas": self.rechazadas}
+
+
+async def _insertar_lote(lote: List[Tuple[int, int, str]], resumen: _ResumenImportacion) -> None:
+    resultado = await run_db(
+        registro_service.crear_en_lote,
+        [(documento, nombre) for _, documento, nombre in lote],
+        chunk_size=len(lote),
+        devolver_creados=False
+    )
+    resumen.insertadas += resultado.total
+    for error in resultado.errores:
+        resumen.rechazar(lote[error.indice][0], error.mensaje, error.documento)
+    logger.info(
+        "Importación de registros: %d líneas procesadas, %d insertadas, %d rechazadas",
+        resumen.procesadas, resumen.insertadas, resumen.rechazadas
+    )
+
+
+async def _importar(filas: AsyncIterator[FilaImportada], resumen: _ResumenImportacion) -> AsyncIterator[None]:
+    """Inserta las filas por lotes; produce un valor tras cada lote confirmado."""
+    lote: List[Tuple[int, int, str]] = []
+
+    async for numero, fila, error in filas:
+        resumen.procesadas += 1
+        if error is not None:
+            resumen.rechazar(numero, error)
+            continue
+
+        documento, nombre = fila
+        lote.append((numero, documento, nombre))
+        if len(lote) >= settings.IMPORT_BATCH_SIZE:
+            await _insertar_lote(lote, resumen)
+            lote = []
+            yield
+
+    if lote:
+        await _insertar_lote(lote, resumen)
+        yield
+
+
+class _RespuestaProgreso(StreamingResponse):
+    """
+    StreamingResponse que no escucha la desconexión del cliente en paralelo: el generador
+    sigue leyendo el cuerpo de la petición, y esa escucha consumiría sus mensajes de
+    `receive`. Una desconexión llega igualmente como ClientDisconnect al leer el cuerpo.
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+
+
+async def _importar_con_progreso(filas: AsyncIterator[FilaImportada]) -> AsyncIterator[str]:
+    """Respuesta NDJSON: una línea de progreso por lote y el resumen al final."""
+    resumen = _ResumenImportacion()
+    async for _ in _importar(filas, resumen):
+        yield json.dumps({"progreso": resumen.progreso()}, ensure_ascii=False) + "\n"
+    yield json.dumps({"resumen": resumen.as_dict()}, ensure_ascii=False) + "\n"
+
+
+@router.post("/import")
+async def importar_registros(
+        request: Request,
+        formato: str = Query("csv", alias="format", pattern="^(ndjson|csv)$"),
+        progreso: bool = Query(False, alias="progress"),
+        current_user=Depends(get_current_admin_user)
+):
+    """
+    Importa registros desde un cuerpo CSV (`documento,nombre`, o con cabecera como la
+    de `/export`) o NDJSON en streaming.
+
+    El cuerpo se procesa a medida que llega y las filas válidas se insertan en
+    transacciones de `IMPORT_BATCH_SIZE` filas, con las mismas validaciones que
+    `crearRegistro`. La respuesta resume el proceso e incluye los rechazos por línea.
+
+    - **progress**: con `true` la respuesta es NDJSON en streaming, con una línea
+      `{"progreso": {...}}` tras cada lote y `{"resumen": {...}}` al final
+    """
+    filas = _filas_csv(request) if formato == "csv" else _filas_ndjson(request)
+    if progreso:
+        return _RespuestaProgreso(_importar_con_progreso(filas), media_type=MEDIA_TYPES["ndjson"])
+
+    resumen = _ResumenImportacion()
+    async for _ in _importar(filas, resumen):
+        pass
+    return resumen.as_dict()
@@ -0,0 +1,4 @@
+# app/services/__init__.py
+from . import conteo, registro, usuario, ultimo_login
+
+__all__ = ["conteo", "registro", "usuario", "ultimo_login"]
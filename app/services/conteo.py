@@ -0,0 +1,102 @@
+# app/services/conteo.py
+"""
+Proveedores de conteo de filas para los listados paginados.
+
+Estrategias (COUNT_STRATEGY):
+- exact: COUNT(*) en cada petición.
+- approximate: filas según sys.dm_db_partition_stats en SQL Server (metadatos, sin
+  recorrer la tabla). En otros dialectos, o si la DMV falla (sin VIEW DATABASE STATE),
+  se usa la estrategia `cached`.
+- cached: COUNT(*) exacto reutilizado durante COUNT_CACHE_TTL segundos. Las escrituras
+  del propio proceso lo invalidan.
+"""
+import logging
+import threading
+import time
+from typing import Optional, Tuple
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+ESTRATEGIAS = ("exact", "approximate", "cached")
+
+
+class CountProvider:
+    def __init__(self, model, strategy: Optional[str] = None, ttl: Optional[float] = None):
+        self.model = model
+        self.strategy = strategy or settings.COUNT_STRATEGY
+        self.ttl = settings.COUNT_CACHE_TTL if ttl is None else ttl
+        if self.strategy not in ESTRATEGIAS:
+            raise ValueError(f"COUNT_STRATEGY inválida: '{self.strategy}'. Opciones: {', '.join(ESTRATEGIAS)}")
+        self._lock = threading.Lock()
+        self._valor: Optional[int] = None
+        self._expira = 0.0
+        # False tras el primer fallo de la DMV: sin permiso no se reintenta en cada petición
+        self._dmv_disponible = True
+
+    def count(self, db: Session) -> Tuple[int, bool]:
+        """Devuelve (total, es_exacto)."""
+        if self.strategy == "exact":
+            return self._exact(db), True
+
+        if self.strategy == "approximate" and self._dmv_disponible and db.get_bind().dialect.name == "mssql":
+            aproximado = self._approximate(db)
+            if aproximado is not None:
+                return aproximado, False
+
+        return self._cached(db)
+
+    def invalidate(self) -> None:
+        """Descarta el valor cacheado (llamar después de insertar o eliminar filas)."""
+        with self._lock:
+            self._valor = None
+            self._expira = 0.0
+
+    def _exact(self, db: Session) -> int:
+        return db.execute(select(func.count()).select_from(self.model.__table__)).scalar_one()
+
+    def _nombre_calificado(self, db: Session) -> str:
+        """`[esquema].[tabla]` para OBJECT_ID; sin esquema en el modelo, el por defecto de la conexión."""
+        dialecto = db.get_bind().dialect
+        tabla = self.model.__table__
+        quote = dialecto.identifier_preparer.quote_identifier
+        return f"{quote(tabla.schema or dialecto.default_schema_name or 'dbo')}.{quote(tabla.name)}"
+
+    def _desactivar_dmv(self, motivo) -> None:
+        self._dmv_disponible = False
+        logger.warning(
+            "Conteo aproximado de '%s' desactivado, se usa el conteo cacheado: %s", self.model.__tablename__, motivo
+        )
+
+    def _approximate(self, db: Session) -> Optional[int]:
+        try:
+            filas = db.execute(
+                text(
+                    "SELECT SUM(row_count) FROM sys.dm_db_partition_stats "
+                    "WHERE object_id = OBJECT_ID(:tabla) AND index_id IN (0, 1)"
+                ),
+                {"tabla": self._nombre_calificado(db)}
+            ).scalar()
+        except Exception as e:
+            # Requiere VIEW DATABASE STATE; el permiso no cambia entre peticiones
+            db.rollback()
+            self._desactivar_dmv(f"no se pudo leer sys.dm_db_partition_stats: {e}")
+            return None
+        if filas is None:
+            # OBJECT_ID no encontró la tabla (o no hay particiones visibles): no es un 0 fiable
+            self._desactivar_dmv("sys.dm_db_partition_stats no devolvió filas para la tabla")
+            return None
+        return filas
+
+    def _cached(self, db: Session) -> Tuple[int, bool]:
+        with self._lock:
+            if self._valor is not None and time.monotonic() < self._expira:
+                return self._valor, False
+
+        valor = self._exact(db)
+        with self._lock:
+            self._valor = valor
+            self._expira = time.monotonic() + self.ttl
+        return valor, True
@@ -0,0 +1,566 @@
+# app/services/registro.py
+"""
+Acceso a datos de registros.
+
+Las funciones reciben una sesión síncrona como primer argumento para poder
+ejecutarse tanto en el threadpool como dentro de AsyncSession.run_sync
+(ver app.core.database.run_db).
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from sqlalchemy import bindparam, delete, insert, select, text, update
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from ..core.config import settings
+from ..models.registro import Registro as RegistroModel
+from ..exceptions import NotFoundException, BadRequestException, ConflictException
+from .conteo import CountProvider
+
+# SQL Server admite como máximo 2100 parámetros por sentencia
+MAX_PARAMETROS_IN = 1000
+
+# Total de registros para los listados (estrategia según COUNT_STRATEGY)
+conteo = CountProvider(RegistroModel)
+
+# Longitud de la columna `nombre`: en SQL Server un valor más largo falla con un error
+# de truncado, que en los lotes rechazaría el bloque completo en lugar de solo ese elemento
+NOMBRE_MAX_LENGTH = RegistroModel.__table__.c.nombre.type.length
+
+
+def validar_documento(documento: int) -> None:
+    if documento <= 0:
+        raise BadRequestException("El documento debe ser un número positivo")
+
+
+def validar_nombre(nombre: str) -> None:
+    if len(nombre) < 2:
+        raise BadRequestException("El nombre debe tener al menos 2 caracteres")
+    if len(nombre) > NOMBRE_MAX_LENGTH:
+        raise BadRequestException(f"El nombre no puede tener más de {NOMBRE_MAX_LENGTH} caracteres")
+
+
+@dataclass
+class ErrorLote:
+    """Error asociado a un elemento de una operación en lote"""
+    indice: int
+    mensaje: str
+    documento: Optional[int] = None
+    id: Optional[int] = None
+
+
+@dataclass
+class ResultadoLote:
+    registros: List[RegistroModel] = field(default_factory=list)
+    errores: List[ErrorLote] = field(default_factory=list)
+    total: int = 0
+
+
+def _en_lotes(valores: Sequence, tamano: int) -> Iterable[Sequence]:
+    for inicio in range(0, len(valores), tamano):
+        yield valores[inicio:inicio + tamano]
+
+
+def documentos_existentes(db: Session, documentos: Sequence[int]) -> Set[int]:
+    """Devuelve cuáles de los documentos indicados ya existen (una consulta por lote de parámetros)."""
+    existentes: Set[int] = set()
+    for lote in _en_lotes(documentos, MAX_PARAMETROS_IN):
+        filas = db.query(RegistroModel.documento).filter(RegistroModel.documento.in_(lote)).all()
+        existentes.update(documento for (documento,) in filas)
+    return existentes
+
+
+def _select_columnas(columnas: Optional[Sequence[str]] = None):
+    """SELECT de las columnas indicadas de registros (todas si `columnas` es None)."""
+    tabla = RegistroModel.__table__
+    if columnas is None:
+        return select(*tabla.c)
+    return select(*(tabla.c[columna] for columna in columnas))
+
+
+def listar(
+        db: Session,
+        skip: int,
+        limit: int,
+        columnas: Optional[Sequence[str]] = None,
+        contar: bool = True
+) -> Tuple[List[Row], int, bool]:
+    """
+    Devuelve una página de registros ordenada por ID, el total de registros y si
+    ese total es exacto (depende de COUNT_STRATEGY).
+
+    `columnas` limita las columnas leídas (una lista vacía omite la consulta de filas)
+    y con `contar=False` no se calcula el total.
+    """
+    registros: List[Row] = []
+    if columnas is None or columnas:
+        tabla = RegistroModel.__table__
+        registros = db.execute(
+            _select_columnas(columnas).order_by(tabla.c.id).offset(skip).limit(limit)
+        ).all()
+
+    total, exacto = conteo.count(db) if contar else (0, True)
+    return registros, total, exacto
+
+
+def listar_despues_de(
+        db: Session,
+        after_id: Optional[int],
+        limit: int,
+        columnas: Optional[Sequence[str]] = None
+) -> List[Row]:
+    """Devuelve hasta `limit` registros con ID mayor que `after_id` (keyset)."""
+    tabla = RegistroModel.__table__
+    query = _select_columnas(columnas)
+    if after_id is not None:
+        query = query.where(tabla.c.id > after_id)
+    return db.execute(query.order_by(tabla.c.id).limit(limit)).all()
+
+
+def obtener(db: Session, registro_id: int) -> Optional[RegistroModel]:
+    return db.query(RegistroModel).filter(RegistroModel.id == registro_id).first()
+
+
+def obtener_por_ids(db: Session, ids: List[int], columnas: Optional[Sequence[str]] = None) -> List[Row]:
+    """Obtiene los registros cuyos IDs se indican con consultas `WHERE id IN (...)`."""
+    tabla = RegistroModel.__table__
+    registros: List[Row] = []
+    for lote in _en_lotes(ids, MAX_PARAMETROS_IN):
+        registros.extend(db.execute(_select_columnas(columnas).where(tabla.c.id.in_(lote))).all())
+    return registros
+
+
+def crear(db: Session, documento: int, nombre: str) -> Row:
+    """
+    Inserta un registro y devuelve la fila creada (INSERT ... OUTPUT inserted.* / RETURNING).
+
+    El índice único sobre `documento` rechaza los duplicados, incluso entre peticiones concurrentes.
+    """
+    validar_documento(documento)
+    validar_nombre(nombre)
+
+    tabla = RegistroModel.__table__
+    try:
+        nuevo_registro = db.execute(
+            insert(tabla).values(documento=documento, nombre=nombre).returning(*tabla.c)
+        ).one()
+        db.commit()
+        conteo.invalidate()
+    except IntegrityError as e:
+        db.rollback()
+        if es_violacion_unicidad(e):
+            raise ConflictException("Ya existe un registro con ese documento")
+        raise
+    except Exception:
+        db.rollback()
+        raise
+    return nuevo_registro
+
+
+def crear_en_lote(
+        db: Session,
+        items: Sequence[Tuple[int, str]],
+        chunk_size: Optional[int] = None,
+        devolver_creados: bool = True
+) -> ResultadoLote:
+    """
+    Crea varios registros a partir de pares (documento, nombre).
+
+    La validación se hace en memoria, los documentos existentes se buscan con
+    consultas IN y las filas válidas se insertan con executemany (fast_executemany
+    en pyodbc) en transacciones de `chunk_size` filas. Los elementos rechazados se
+    informan en `errores` con su posición en `items`.
+    """
+    chunk_size = chunk_size or settings.BULK_CHUNK_SIZE
+    resultado = ResultadoLote()
+    validos: List[Tuple[int, int, str]] = []
+    vistos: Set[int] = set()
+
+    for indice, (documento, nombre) in enumerate(items):
+        try:
+            validar_documento(documento)
+            validar_nombre(nombre)
+        except BadRequestException as e:
+            resultado.errores.append(ErrorLote(indice=indice, documento=documento, mensaje=e.detail))
+            continue
+        if documento in vistos:
+            resultado.errores.append(
+                ErrorLote(indice=indice, documento=documento, mensaje="Documento duplicado en el lote")
+            )
+            continue
+        vistos.add(documento)
+        validos.append((indice, documento, nombre))
+
+    existentes = documentos_existentes(db, [documento for _, documento, _ in validos])
+    if existentes:
+        for indice, documento, _ in validos:
+            if documento in existentes:
+                resultado.errores.append(
+                    ErrorLote(indice=indice, documento=documento, mensaje="Ya existe un registro con ese documento")
+                )
+        validos = [item for item in validos if item[1] not in existentes]
+
+    tabla = RegistroModel.__table__
+    for lote in _en_lotes(validos, chunk_size):
+        filas = [{"documento": documento, "nombre": nombre} for _, documento, nombre in lote]
+        try:
+            db.execute(insert(tabla), filas)
+            if devolver_creados:
+                resultado.registros.extend(obtener_por_documentos(db, [f["documento"] for f in filas]))
+            db.commit()
+            conteo.invalidate()
+            resultado.total += len(filas)
+        except Exception as e:
+            db.rollback()
+            for indice, documento, _ in lote:
+                resultado.errores.append(
+                    ErrorLote(indice=indice, documento=documento, mensaje=f"Error al insertar el lote: {str(e)}")
+                )
+
+    resultado.errores.sort(key=lambda error: error.indice)
+    return resultado
+
+
+def obtener_por_documentos(db: Session, documentos: Sequence[int]) -> List[RegistroModel]:
+    registros: List[RegistroModel] = []
+    for lote in _en_lotes(documentos, MAX_PARAMETROS_IN):
+        registros.extend(
+            db.query(RegistroModel)
+            .filter(RegistroModel.documento.in_(lote))
+            .order_by(RegistroModel.id)
+            .all()
+        )
+    return registros
+
+
+def _sentencia_upsert(dialecto: str, filas: List[Dict[str, Any]]):
+    """
+    Construye un insert-or-update de una sola sentencia para el dialecto indicado.
+
+    SQL Server usa MERGE ... WITH (HOLDLOCK) para evitar la carrera entre la búsqueda y
+    la inserción; SQLite y PostgreSQL usan INSERT ... ON CONFLICT (documento) DO UPDATE.
+    Para otros dialectos devuelve None (ver `_upsert_generico`).
+    """
+    tabla = RegistroModel.__table__
+
+    if dialecto == "mssql":
+        valores = ", ".join(f"(:documento_{i}, :nombre_{i})" for i in range(len(filas)))
+        parametros: Dict[str, Any] = {}
+        for i, fila in enumerate(filas):
+            parametros[f"documento_{i}"] = fila["documento"]
+            parametros[f"nombre_{i}"] = fila["nombre"]
+        return text(
+            f"MERGE {tabla.name} WITH (HOLDLOCK) AS destino "
+            f"USING (VALUES {valores}) AS origen (documento, nombre) "
+            "ON destino.documento = origen.documento "
+            "WHEN MATCHED THEN UPDATE SET nombre = origen.nombre "
+            "WHEN NOT MATCHED THEN INSERT (documento, nombre) VALUES (origen.documento, origen.nombre) "
+            "OUTPUT inserted.id, inserted.documento, inserted.nombre, inserted.fecha_creacion;"
+        ).bindparams(**parametros)
+
+    if dialecto == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialecto == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        return None
+
+    sentencia = dialect_insert(tabla).values(filas)
+    return sentencia.on_conflict_do_update(
+        index_elements=[tabla.c.documento],
+        set_={"nombre": sentencia.excluded.nombre}
+    ).returning(*tabla.c)
+
+
+def _upsert_generico(db: Session, filas: List[Dict[str, Any]]) -> List[Row]:
+    """
+    Upsert portable para dialectos sin MERGE ni ON CONFLICT: busca los documentos
+    existentes, actualiza esos e inserta el resto, dentro de la transacción en curso.
+
+    Una inserción concurrente del mismo documento la rechaza el índice único
+    (IntegrityError), igual que en `crear`.
+    """
+    tabla = RegistroModel.__table__
+    documentos = [fila["documento"] for fila in filas]
+    existentes = documentos_existentes(db, documentos)
+
+    actualizar_filas = [
+        {"b_documento": fila["documento"], "b_nombre": fila["nombre"]}
+        for fila in filas if fila["documento"] in existentes
+    ]
+    if actualizar_filas:
+        db.execute(
+            update(tabla)
+            .where(tabla.c.documento == bindparam("b_documento"))
+            .values(nombre=bindparam("b_nombre")),
+            actualizar_filas
+        )
+    nuevas = [fila for fila in filas if fila["documento"] not in existentes]
+    if nuevas:
+        db.execute(insert(tabla), nuevas)
+
+    por_documento: Dict[int, Row] = {}
+    for lote in _en_lotes(documentos, MAX_PARAMETROS_IN):
+        for fila in db.execute(select(*tabla.c).where(tabla.c.documento.in_(lote))):
+            por_documento[fila.documento] = fila
+    return [por_documento[documento] for documento in documentos]
+
+
+def _ejecutar_upsert(db: Session, filas: List[Dict[str, Any]]) -> List[Row]:
+    """Ejecuta el upsert de `filas` y devuelve las filas resultantes."""
+    sentencia = _sentencia_upsert(db.get_bind().dialect.name, filas)
+    if sentencia is None:
+        return _upsert_generico(db, filas)
+    return db.execute(sentencia).all()
+
+
+def upsert(db: Session, documento: int, nombre: str) -> Row:
+    """Crea el registro con ese documento o actualiza su nombre si ya existe."""
+    validar_documento(documento)
+    validar_nombre(nombre)
+
+    try:
+        registro, = _ejecutar_upsert(db, [{"documento": documento, "nombre": nombre}])
+        db.commit()
+        conteo.invalidate()
+    except IntegrityError as e:
+        db.rollback()
+        if es_violacion_unicidad(e):
+            raise ConflictException("Ya existe un registro con ese documento")
+        raise
+    except Exception:
+        db.rollback()
+        raise
+    return registro
+
+
+def upsert_en_lote(
+        db: Session,
+        items: Sequence[Tuple[int, str]],
+        chunk_size: Optional[int] = None
+) -> ResultadoLote:
+    """Upsert de varios pares (documento, nombre): una sentencia y una transacción por bloque."""
+    # Cada fila usa dos parámetros en el MERGE
+    chunk_size = min(chunk_size or settings.BULK_CHUNK_SIZE, MAX_PARAMETROS_IN)
+    resultado = ResultadoLote()
+    validos: List[Tuple[int, int, str]] = []
+    vistos: Set[int] = set()
+
+    for indice, (documento, nombre) in enumerate(items):
+        try:
+            validar_documento(documento)
+            validar_nombre(nombre)
+        except BadRequestException as e:
+            resultado.errores.append(ErrorLote(indice=indice, documento=documento, mensaje=e.detail))
+            continue
+        if documento in vistos:
+            resultado.errores.append(
+                ErrorLote(indice=indice, documento=documento, mensaje="Documento duplicado en el lote")
+            )
+            continue
+        vistos.add(documento)
+        validos.append((indice, documento, nombre))
+
+    for lote in _en_lotes(validos, chunk_size):
+        filas = [{"documento": documento, "nombre": nombre} for _, documento, nombre in lote]
+        try:
+            resultado.registros.extend(_ejecutar_upsert(db, filas))
+            db.commit()
+            conteo.invalidate()
+            resultado.total += len(filas)
+        except Exception as e:
+            db.rollback()
+            mensaje = (
+                "Ya existe un registro con ese documento"
+                if isinstance(e, IntegrityError) and es_violacion_unicidad(e)
+                else f"Error al guardar el lote: {str(e)}"
+            )
+            for indice, documento, _ in lote:
+                resultado.errores.append(ErrorLote(indice=indice, documento=documento, mensaje=mensaje))
+
+    resultado.errores.sort(key=lambda error: error.indice)
+    return resultado
+
+
+def es_violacion_unicidad(exc: IntegrityError) -> bool:
+    """Indica si un IntegrityError proviene de una restricción UNIQUE / índice único."""
+    mensaje = str(exc.orig).lower()
+    return "unique" in mensaje or "duplicate" in mensaje
+
+
+def _valores_actualizacion(documento: Optional[int], nombre: Optional[str]) -> Dict[str, Any]:
+    valores: Dict[str, Any] = {}
+    if documento is not None:
+        validar_documento(documento)
+        valores["documento"] = documento
+    if nombre is not None:
+        validar_nombre(nombre)
+        valores["nombre"] = nombre
+    return valores
+
+
+def _update_returning(registro_id: int, valores: Dict[str, Any]):
+    """UPDATE ... OUTPUT inserted.* (SQL Server) / RETURNING (otros dialectos)"""
+    tabla = RegistroModel.__table__
+    return update(tabla).where(tabla.c.id == registro_id).values(**valores).returning(*tabla.c)
+
+
+def actualizar(
+        db: Session,
+        registro_id: int,
+        documento: Optional[int] = None,
+        nombre: Optional[str] = None
+) -> Row:
+    """
+    Actualiza un registro con una única sentencia UPDATE que devuelve la fila modificada.
+
+    La unicidad del documento la garantiza la restricción UNIQUE de la tabla.
+    """
+    valores = _valores_actualizacion(documento, nombre)
+    if not valores:
+        registro = obtener(db, registro_id)
+        if not registro:
+            raise NotFoundException("Registro no encontrado")
+        return registro
+
+    try:
+        registro = db.execute(_update_returning(registro_id, valores)).first()
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        if es_violacion_unicidad(e):
+            raise ConflictException("Ya existe otro registro con ese documento")
+        raise
+    except Exception:
+        db.rollback()
+        raise
+
+    if registro is None:
+        raise NotFoundException("Registro no encontrado")
+    return registro
+
+
+def actualizar_en_lote(
+        db: Session,
+        items: Sequence[Tuple[int, Optional[int], Optional[str]]]
+) -> ResultadoLote:
+    """
+    Actualiza varios registros a partir de tuplas (id, documento, nombre) en una sola transacción.
+
+    Cada elemento es un UPDATE ... RETURNING. Los que cambian el documento se ejecutan
+    dentro de un savepoint para que un documento duplicado solo rechace ese elemento.
+    """
+    resultado = ResultadoLote()
+    ids_vistos: Set[int] = set()
+    documentos_vistos: Set[int] = set()
+
+    try:
+        for indice, (registro_id, documento, nombre) in enumerate(items):
+            try:
+                valores = _valores_actualizacion(documento, nombre)
+            except BadRequestException as e:
+                resultado.errores.append(
+                    ErrorLote(indice=indice, id=registro_id, documento=documento, mensaje=e.detail)
+                )
+                continue
+
+            if registro_id in ids_vistos:
+                resultado.errores.append(
+                    ErrorLote(indice=indice, id=registro_id, mensaje="Registro duplicado en el lote")
+                )
+                continue
+            if documento is not None and documento in documentos_vistos:
+                resultado.errores.append(
+                    ErrorLote(indice=indice, id=registro_id, documento=documento,
+                              mensaje="Documento duplicado en el lote")
+                )
+                continue
+            if not valores:
+                resultado.errores.append(
+                    ErrorLote(indice=indice, id=registro_id, mensaje="No se indicaron campos a actualizar")
+                )
+                continue
+            ids_vistos.add(registro_id)
+
+            try:
+                if "documento" in valores:
+                    documentos_vistos.add(documento)
+                    with db.begin_nested():
+                        registro = db.execute(_update_returning(registro_id, valores)).first()
+                else:
+                    registro = db.execute(_update_returning(registro_id, valores)).first()
+            except IntegrityError as e:
+                if not es_violacion_unicidad(e):
+                    raise
+                resultado.errores.append(
+                    ErrorLote(indice=indice, id=registro_id, documento=documento,
+                              mensaje="Ya existe otro registro con ese documento")
+                )
+                continue
+
+            if registro is None:
+                resultado.errores.append(
+                    ErrorLote(indice=indice, id=registro_id, mensaje="Registro no encontrado")
+                )
+                continue
+            resultado.registros.append(registro)
+
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    resultado.total = len(resultado.registros)
+    return resultado
+
+
+def eliminar(db: Session, registro_id: int) -> Row:
+    """Elimina un registro con un DELETE ... OUTPUT deleted.* / RETURNING."""
+    tabla = RegistroModel.__table__
+    try:
+        registro = db.execute(
+            delete(tabla).where(tabla.c.id == registro_id).returning(*tabla.c)
+        ).first()
+        db.commit()
+        conteo.invalidate()
+    except Exception:
+        db.rollback()
+        raise
+
+    if registro is None:
+        raise NotFoundException("Registro no encontrado")
+    return registro
+
+
+def eliminar_en_lote(db: Session, ids: Sequence[int]) -> ResultadoLote:
+    """Elimina varios registros con sentencias DELETE ... WHERE id IN (...) RETURNING."""
+    tabla = RegistroModel.__table__
+    resultado = ResultadoLote()
+    ids_unicos = list(dict.fromkeys(ids))
+
+    try:
+        for lote in _en_lotes(ids_unicos, MAX_PARAMETROS_IN):
+            resultado.registros.extend(
+                db.execute(delete(tabla).where(tabla.c.id.in_(lote)).returning(*tabla.c)).all()
+            )
+        db.commit()
+        conteo.invalidate()
+    except Exception:
+        db.rollback()
+        raise
+
+    eliminados = {r.id for r in resultado.registros}
+    vistos: Set[int] = set()
+    for indice, registro_id in enumerate(ids):
+        if registro_id in vistos:
+            resultado.errores.append(
+                ErrorLote(indice=indice, id=registro_id, mensaje="Registro duplicado en el lote")
+            )
+        elif registro_id not in eliminados:
+            resultado.errores.append(
+                ErrorLote(indice=indice, id=registro_id, mensaje="Registro no encontrado")
+            )
+        vistos.add(registro_id)
+
+    resultado.total = len(resultado.registros)
+    return resultado
@@ -0,0 +1,88 @@
+# app/services/ultimo_login.py
+"""
+Escritura diferida (write-behind) de `usuarios.ultimo_login`.
+
+El login solo anota la fecha en memoria; un hilo en segundo plano vuelca las fechas
+pendientes en un único UPDATE por lotes cada LOGIN_FLUSH_INTERVAL segundos o al
+acumular LOGIN_FLUSH_MAX usuarios, y una última vez al detener la aplicación.
+"""
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+from ..core.config import settings
+from ..core.database import SessionLocal
+from . import usuario as usuario_service
+
+logger = logging.getLogger(__name__)
+
+
+class UltimoLoginBuffer:
+    def __init__(self, intervalo: float, maximo: int):
+        self.intervalo = intervalo
+        self.maximo = maximo
+        self._pendientes: Dict[int, datetime] = {}
+        self._lock = threading.Lock()
+        self._despertar = threading.Event()
+        self._detener = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+
+    def registrar(self, usuario_id: int, fecha: datetime) -> None:
+        """Anota el último login del usuario; solo se conserva la fecha más reciente."""
+        with self._lock:
+            self._pendientes[usuario_id] = fecha
+            lleno = len(self._pendientes) >= self.maximo
+        if lleno:
+            self._despertar.set()
+
+    def flush(self) -> int:
+        """Escribe las fechas pendientes y devuelve cuántos usuarios se actualizaron."""
+        with self._lock:
+            pendientes, self._pendientes = self._pendientes, {}
+        if not pendientes:
+            return 0
+
+        db = SessionLocal()
+        try:
+            usuario_service.actualizar_ultimo_login(db, pendientes)
+        except Exception as e:
+            db.rollback()
+            logger.error("No se pudo actualizar ultimo_login de %d usuarios: %s", len(pendientes), e)
+            # Se reintentan en el siguiente volcado salvo que ya exista una fecha más nueva
+            with self._lock:
+                for usuario_id, fecha in pendientes.items():
+                    self._pendientes.setdefault(usuario_id, fecha)
+            return 0
+        finally:
+            db.close()
+
+        logger.debug("ultimo_login actualizado para %d usuarios", len(pendientes))
+        return len(pendientes)
+
+    def _ejecutar(self) -> None:
+        while not self._detener.is_set():
+            self._despertar.wait(self.intervalo)
+            self._despertar.clear()
+            self.flush()
+
+    def start(self) -> None:
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._ejecutar, name="ultimo-login-flush", daemon=True)
+        self._hilo.start()
+
+    def stop(self) -> None:
+        """Detiene el hilo y vuelca lo que quede pendiente."""
+        self._detener.set()
+        self._despertar.set()
+        if self._hilo is not None:
+            self._hilo.join()
+            self._hilo = None
+        self.flush()
+
+
+ultimo_login = UltimoLoginBuffer(
+    intervalo=settings.LOGIN_FLUSH_INTERVAL,
+    maximo=settings.LOGIN_FLUSH_MAX
+)
@@ -0,0 +1,55 @@
+# app/services/usuario.py
+"""
+Acceso a datos de usuarios para el router de autenticación.
+
+Igual que en app.services.registro, las funciones reciben una sesión síncrona como
+primer argumento y se ejecutan con app.core.database.run_db.
+"""
+from datetime import datetime
+from typing import Dict, Optional
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from ..models.usuario import Usuario as UsuarioModel
+from ..schemas.usuario import UsuarioCreate
+from ..exceptions import BadRequestException
+
+
+def obtener_por_username(db: Session, username: str) -> Optional[UsuarioModel]:
+    return db.execute(
+        select(UsuarioModel).where(UsuarioModel.username == username)
+    ).scalar_one_or_none()
+
+
+def validar_disponible(db: Session, email: str, username: str) -> None:
+    """Verifica que el email y el username no estén registrados."""
+    if db.execute(select(UsuarioModel.id).where(UsuarioModel.email == email)).first():
+        raise BadRequestException("El correo electrónico ya está registrado")
+
+    if db.execute(select(UsuarioModel.id).where(UsuarioModel.username == username)).first():
+        raise BadRequestException("El nombre de usuario ya está en uso")
+
+
+def crear(db: Session, usuario: UsuarioCreate, hashed_password: str) -> UsuarioModel:
+    db_usuario = UsuarioModel(
+        email=usuario.email,
+        username=usuario.username,
+        hashed_password=hashed_password,
+        nombre=usuario.nombre,
+        apellido=usuario.apellido,
+        is_active=usuario.is_active,
+        is_admin=usuario.is_admin
+    )
+
+    db.add(db_usuario)
+    db.commit()
+    db.refresh(db_usuario)
+    return db_usuario
+
+
+def actualizar_ultimo_login(db: Session, fechas: Dict[int, datetime]) -> None:
+    """Actualiza `ultimo_login` de varios usuarios en un único UPDATE por lotes (executemany)."""
+    db.execute(
+        update(UsuarioModel),
+        [{"id": usuario_id, "ultimo_login": fecha} for usuario_id, fecha in fechas.items()]
+    )
+    db.commit()
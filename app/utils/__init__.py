@@ -1,3 +1,4 @@
 from .validators import validate_email, validate_password_strength, validate_username, validate_required_field
+from .cache import LRUCache
 
-__all__ = ["validate_email", "validate_password_strength", "validate_username", "validate_required_field"]
\ No newline at end of file
+__all__ = ["validate_email", "validate_password_strength", "validate_username", "validate_required_field", "LRUCache"]
\ No newline at end of file
@@ -0,0 +1,95 @@
+"""
+Benchmark de la caché de documentos GraphQL (DocumentCache).
+
+Ejecuta un documento típico de 2-5 KB con el esquema de la aplicación y con una copia
+que tiene las mismas extensiones salvo DocumentCache, y muestra el tiempo de CPU por
+petición. Los campos usan `@skip(if: $skip)` para que no se ejecute ningún
+resolver y se mida solo el coste de parseo, validación y arranque de la ejecución.
+
+Uso:
+    python -m benchmarks.bench_document_cache [iteraciones]
+"""
+import asyncio
+import os
+import sys
+import time
+
+# Configuración mínima para importar la aplicación sin SQL Server
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("DB_NAME", "benchmark")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-de-32-caracteres")
+os.environ.setdefault("SQLALCHEMY_DATABASE_URI", "sqlite://")
+
+import strawberry  # noqa: E402
+
+from app.graphql import schema as schema_con_cache  # noqa: E402
+from app.graphql.extensions import DocumentCache  # noqa: E402
+from app.graphql.resolvers import Query, Mutation  # noqa: E402
+
+CAMPOS = """
+        success
+        message
+        registro { id documento nombre fechaCreacion }
+"""
+
+
+def construir_documento(alias: int = 30) -> str:
+    campos = "\n".join(
+        f"    r{i}: registro(id: {i}) @skip(if: $skip) {{{CAMPOS}    }}" for i in range(alias)
+    )
+    listado = """
+    lista: registros(skip: 0, limit: 50) @skip(if: $skip) {
+        success
+        message
+        total
+        totalIsExact
+        registros { ...CamposRegistro }
+    }
+    pagina: registrosConnection(first: 20) @skip(if: $skip) {
+        edges { cursor node { ...CamposRegistro } }
+        pageInfo { hasNextPage endCursor }
+    }
+"""
+    return (
+        "query Panel($skip: Boolean!) {\n"
+        f"{campos}\n{listado}"
+        "}\n\n"
+        "fragment CamposRegistro on Registro { id documento nombre fechaCreacion }\n"
+    )
+
+
+async def medir(schema: strawberry.Schema, documento: str, iteraciones: int) -> float:
+    variables = {"skip": True}
+    # Calentamiento (llena la caché en el caso con DocumentCache)
+    resultado = await schema.execute(documento, variable_values=variables)
+    assert not resultado.errors, resultado.errors
+
+    inicio = time.process_time()
+    for _ in range(iteraciones):
+        await schema.execute(documento, variable_values=variables)
+    return (time.process_time() - inicio) / iteraciones
+
+
+def main() -> None:
+    iteraciones = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    # Mismas extensiones que el esquema de la aplicación: solo cambia DocumentCache
+    schema_sin_cache = strawberry.Schema(
+        query=Query,
+        mutation=Mutation,
+        extensions=[e for e in schema_con_cache.extensions if e is not DocumentCache],
+    )
+
+    for alias in (15, 30):
+        documento = construir_documento(alias)
+        sin_cache = asyncio.run(medir(schema_sin_cache, documento, iteraciones))
+        con_cache = asyncio.run(medir(schema_con_cache, documento, iteraciones))
+        print(
+            f"documento {len(documento.encode()) / 1024:.1f} KB | "
+            f"sin caché {sin_cache * 1e6:8.1f} µs | con caché {con_cache * 1e6:8.1f} µs | "
+            f"ahorro {(sin_cache - con_cache) * 1e6:8.1f} µs/petición "
+            f"({(1 - con_cache / sin_cache) * 100:.0f}%)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Benchmark del tiempo de importación de la aplicación (arranque en frío de un worker).
+
+Importa `app.main` en procesos nuevos, muestra la mediana y el peor tiempo, y los
+módulos propios más lentos según `python -X importtime`. Con un presupuesto en
+milisegundos termina con código 1 si la mediana lo supera, para detectar regresiones
+en CI.
+
+Se importa con la configuración de producción (engine mssql+pyodbc y rate limiting
+sobre SQLite), de modo que la medición incluye la detección del driver ODBC y la
+creación de los limitadores. Solo se definen las variables obligatorias. Si pyodbc no
+puede importarse (p. ej. falta libodbc) se usa un módulo `pyodbc` mínimo sin drivers;
+en ese caso el resultado no incluye la carga de la biblioteca nativa.
+
+Uso:
+    python -m benchmarks.bench_import_time [repeticiones] [presupuesto_ms]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Solo las variables obligatorias; el resto de la configuración usa sus valores por defecto
+ENTORNO = {
+    **os.environ,
+    "DB_HOST": os.environ.get("DB_HOST", "localhost"),
+    "DB_NAME": os.environ.get("DB_NAME", "benchmark"),
+    "SECRET_KEY": os.environ.get("SECRET_KEY", "benchmark-secret-key-de-32-caracteres"),
+}
+
+MODULO = "app.main"
+
+# Lo mínimo que el dialecto mssql+pyodbc de SQLAlchemy necesita para crear el engine
+PYODBC_SIMULADO = """
+version = "5.0.0"
+paramstyle = "qmark"
+pooling = True
+SQL_VARCHAR = 12
+SQL_WVARCHAR = -9
+
+
+class Error(Exception):
+    pass
+
+
+class Cursor:
+    def nextset(self):
+        return False
+
+
+class Connection:
+    pass
+
+
+def drivers():
+    return []
+
+
+def connect(*args, **kwargs):
+    raise Error("pyodbc simulado por bench_import_time: no hay conexión")
+"""
+
+
+def preparar_pyodbc() -> bool:
+    """Añade un pyodbc simulado al PYTHONPATH si el real no puede importarse. Devuelve si se simuló."""
+    real = subprocess.run([sys.executable, "-c", "import pyodbc"], env=ENTORNO, capture_output=True)
+    if real.returncode == 0:
+        return False
+    directorio = tempfile.mkdtemp(prefix="bench_pyodbc_")
+    with open(os.path.join(directorio, "pyodbc.py"), "w", encoding="utf-8") as f:
+        f.write(PYODBC_SIMULADO)
+    ENTORNO["PYTHONPATH"] = os.pathsep.join(filter(None, [directorio, ENTORNO.get("PYTHONPATH")]))
+    return True
+
+
+def medir_importacion() -> float:
+    """Segundos que tarda un proceso nuevo en importar MODULO (sin el arranque del intérprete)."""
+    codigo = (
+        "import time; inicio = time.perf_counter(); "
+        f"import {MODULO}; print(time.perf_counter() - inicio)"
+    )
+    salida = subprocess.run(
+        [sys.executable, "-c", codigo], env=ENTORNO, check=True, capture_output=True, text=True
+    )
+    return float(salida.stdout.strip().splitlines()[-1])
+
+
+def modulos_mas_lentos(cantidad: int = 10):
+    """Módulos de `app` con mayor tiempo propio según -X importtime."""
+    salida = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {MODULO}"],
+        env=ENTORNO, check=True, capture_output=True, text=True
+    )
+    tiempos = []
+    for linea in salida.stderr.splitlines():
+        if not linea.startswith("import time:") or "self [us]" in linea:
+            continue
+        propio, acumulado, nombre = (parte.strip() for parte in linea[len("import time:"):].split("|"))
+        if nombre.startswith("app"):
+            tiempos.append((int(propio), int(acumulado), nombre))
+    return sorted(tiempos, reverse=True)[:cantidad]
+
+
+def main() -> int:
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    presupuesto_ms = float(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    if preparar_pyodbc():
+        print("pyodbc no disponible: se usa un módulo simulado sin drivers ODBC\n")
+
+    inicio = time.perf_counter()
+    tiempos = [medir_importacion() * 1000 for _ in range(repeticiones)]
+    mediana = statistics.median(tiempos)
+
+    print(f"import {MODULO}: {repeticiones} procesos en {time.perf_counter() - inicio:.1f} s")
+    print(f"  mediana: {mediana:8.1f} ms")
+    print(f"  máximo:  {max(tiempos):8.1f} ms")
+    print("\nMódulos de la aplicación con mayor tiempo propio:")
+    for propio, acumulado, nombre in modulos_mas_lentos():
+        print(f"  {propio / 1000:7.1f} ms  (acumulado {acumulado / 1000:7.1f} ms)  {nombre}")
+
+    if presupuesto_ms is not None and mediana > presupuesto_ms:
+        print(f"\nERROR: la mediana ({mediana:.1f} ms) supera el presupuesto de {presupuesto_ms:.1f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""
+Benchmark del costo de la instrumentación Prometheus en /graphql.
+
+Ejecuta la misma operación (un listado y dos registros por ID sobre un archivo SQLite
+temporal) con y sin las métricas: sin ellas el esquema no lleva PrometheusMetrics,
+ResolverMetrics no registra nada y las sentencias SQL no se notifican a
+`metrics.registrar_sentencia`. El rate limiting queda deshabilitado para no medir
+su acceso al almacenamiento. Muestra el tiempo de CPU por operación.
+
+Uso:
+    python -m benchmarks.bench_metrics_overhead [iteraciones]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+# Configuración mínima para importar la aplicación sin SQL Server
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("DB_NAME", "benchmark")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-de-32-caracteres")
+os.environ.setdefault(
+    "SQLALCHEMY_DATABASE_URI", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench_metricas.db")
+)
+os.environ["GRAPHQL_RATE_LIMIT"] = ""
+os.environ["SLOW_QUERY_LOG_PATH"] = ""
+
+import strawberry  # noqa: E402
+
+from app.core import database, metrics  # noqa: E402
+from app.core.database import Base, SessionLocal, engine  # noqa: E402
+from app.graphql import get_context, schema as schema_con_metricas  # noqa: E402
+from app.graphql.extensions import ResolverMetrics  # noqa: E402
+from app.graphql.resolvers import Query, Mutation  # noqa: E402
+from app.services import registro as registro_service  # noqa: E402
+
+DOCUMENTO = """
+query Panel {
+    lista: registros(skip: 0, limit: 20) { success total registros { id documento nombre } }
+    r1: registro(id: 1) { success registro { id nombre } }
+    r2: registro(id: 2) { success registro { id nombre } }
+}
+"""
+
+
+def preparar_datos() -> None:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        registro_service.crear_en_lote(db, [(i, f"Registro {i}") for i in range(1, 51)])
+    finally:
+        db.close()
+
+
+async def medir(schema: strawberry.Schema, iteraciones: int) -> float:
+    async def ejecutar() -> None:
+        resultado = await schema.execute(DOCUMENTO, context_value=await get_context())
+        assert not resultado.errors, resultado.errors
+
+    await ejecutar()  # calentamiento
+    inicio = time.process_time()
+    for _ in range(iteraciones):
+        await ejecutar()
+    return (time.process_time() - inicio) / iteraciones
+
+
+def sin_metricas(schema: strawberry.Schema, iteraciones: int) -> float:
+    registrar = ResolverMetrics._registrar
+    ResolverMetrics._registrar = staticmethod(lambda campo, inicio, resultado: None)
+    database._suscriptores.remove(metrics.registrar_sentencia)
+    try:
+        return asyncio.run(medir(schema, iteraciones))
+    finally:
+        database._suscriptores.append(metrics.registrar_sentencia)
+        ResolverMetrics._registrar = staticmethod(registrar)
+
+
+def main() -> None:
+    iteraciones = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    preparar_datos()
+    extensiones = [e for e in schema_con_metricas.extensions if e.__name__ != "PrometheusMetrics"]
+    schema_sin_metricas = strawberry.Schema(query=Query, mutation=Mutation, extensions=extensiones)
+
+    for _ in range(3):
+        base = sin_metricas(schema_sin_metricas, iteraciones)
+        con_metricas = asyncio.run(medir(schema_con_metricas, iteraciones))
+        print(
+            f"sin métricas {base * 1e6:8.1f} µs | con métricas {con_metricas * 1e6:8.1f} µs | "
+            f"costo {(con_metricas - base) * 1e6:7.1f} µs/operación "
+            f"({(con_metricas / base - 1) * 100:+.1f}%)"
+        )
+
+
+if __name__ == "__main__":
+    main()
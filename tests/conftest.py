@@ -0,0 +1,113 @@
+"""
+Configuración común de las pruebas.
+
+La aplicación lee la configuración al importarse, así que el entorno se define aquí
+antes de importar `app`: SQLite en un directorio temporal, rate limiting en memoria y
+sin log de sentencias lentas. El fixture `db_async` ejecuta cada prueba que lo usa con
+DB_ASYNC=False (sesiones síncronas en el threadpool) y con DB_ASYNC=True (AsyncSession
+sobre sqlite+aiosqlite).
+"""
+import os
+import tempfile
+
+_DIRECTORIO = tempfile.mkdtemp(prefix="pruebas_api_")
+
+os.environ.update({
+    "DB_HOST": "localhost",
+    "DB_NAME": "pruebas",
+    "SECRET_KEY": "clave-secreta-de-pruebas-de-32-caracteres",
+    "SQLALCHEMY_DATABASE_URI": "sqlite:///" + os.path.join(_DIRECTORIO, "pruebas.db"),
+    "DB_ASYNC": "False",
+    "DB_AUTO_MIGRATE": "False",
+    "DB_POOL_PREWARM": "0",
+    "RATE_LIMIT_STORAGE_URI": "memory://",
+    "GRAPHQL_RATE_LIMIT": "",
+    "SLOW_QUERY_LOG_PATH": "",
+    "SQL_STATS_IN_RESPONSE": "False",
+})
+
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple  # noqa: E402
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import delete  # noqa: E402
+
+from app.core import database  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.core.migrations import upgrade  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.registro import Registro as RegistroModel  # noqa: E402
+from app.services import registro as registro_service  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def esquema() -> None:
+    """Crea las tablas y aplica las migraciones una vez por sesión."""
+    upgrade()
+
+
+@pytest.fixture(autouse=True)
+def tabla_vacia() -> None:
+    """Cada prueba empieza sin registros."""
+    with database.SessionLocal() as db:
+        db.execute(delete(RegistroModel))
+        db.commit()
+
+
+@pytest.fixture(params=[False, True], ids=["DB_ASYNC=False", "DB_ASYNC=True"])
+def db_async(request, monkeypatch) -> Iterator[bool]:
+    """
+    Modo de acceso a datos de los resolvers.
+
+    Con True se crea un AsyncEngine sobre la misma base de datos (sqlite+aiosqlite),
+    igual que hace `app.core.database` con DB_ASYNC=True. NullPool evita compartir
+    conexiones aiosqlite entre los event loops de las distintas peticiones.
+    """
+    if not request.param:
+        yield False
+        return
+
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from sqlalchemy.pool import NullPool
+
+    async_engine = create_async_engine(
+        database.get_async_database_uri(settings.database_uri), poolclass=NullPool
+    )
+    monkeypatch.setattr(settings, "DB_ASYNC", True)
+    monkeypatch.setattr(database, "async_engine", async_engine)
+    monkeypatch.setattr(
+        database, "AsyncSessionLocal",
+        async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    )
+    yield True
+
+
+@pytest.fixture(scope="session")
+def client() -> Iterator[TestClient]:
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture
+def graphql(client):
+    """Envía una operación a /graphql y devuelve el cuerpo JSON de la respuesta."""
+    def consultar(
+            query: Optional[str] = None,
+            variables: Optional[Dict[str, Any]] = None,
+            **cuerpo: Any
+    ) -> Dict[str, Any]:
+        datos = {**({"query": query} if query is not None else {}), "variables": variables or {}, **cuerpo}
+        respuesta = client.post("/graphql", json=datos)
+        return respuesta.json()
+    return consultar
+
+
+@pytest.fixture
+def crear_registros():
+    """Inserta registros (documento, nombre) y devuelve sus IDs en el mismo orden."""
+    def crear(filas: Sequence[Tuple[int, str]]) -> List[int]:
+        with database.SessionLocal() as db:
+            resultado = registro_service.crear_en_lote(db, filas)
+        assert not resultado.errores, resultado.errores
+        return [r.id for r in resultado.registros]
+    return crear
@@ -0,0 +1,96 @@
+"""Automatic Persisted Queries: protocolo en /graphql y allowlist."""
+import json
+
+import pytest
+
+from app.graphql.persisted_queries import PersistedQueryStore, persisted_query_store, query_hash
+from app.utils.cache import LRUCache
+
+CONSULTA = "query TotalRegistros { registros { total } }"
+
+
+def extension(documento: str = CONSULTA, version: int = 1):
+    return {"persistedQuery": {"version": version, "sha256Hash": query_hash(documento)}}
+
+
+def codigos(resultado):
+    return [e["extensions"]["code"] for e in resultado.get("errors") or ()]
+
+
+@pytest.fixture(autouse=True)
+def cache_vacia(monkeypatch):
+    """Cada prueba empieza sin documentos registrados por clientes."""
+    monkeypatch.setattr(persisted_query_store, "_cache", LRUCache(10))
+
+
+def test_hash_desconocido_y_registro(graphql, crear_registros):
+    crear_registros([(1, "Ana")])
+
+    assert codigos(graphql(extensions=extension())) == ["PERSISTED_QUERY_NOT_FOUND"]
+
+    registrada = graphql(CONSULTA, extensions=extension())
+    assert registrada["data"] == {"registros": {"total": 1}}
+
+    solo_hash = graphql(extensions=extension())
+    assert solo_hash["data"] == {"registros": {"total": 1}}
+
+
+def test_get_solo_con_el_hash(client, graphql):
+    graphql(CONSULTA, extensions=extension())
+
+    respuesta = client.get("/graphql", params={"extensions": json.dumps(extension())})
+
+    assert respuesta.status_code == 200
+    assert respuesta.json()["data"] == {"registros": {"total": 0}}
+
+
+def test_hash_que_no_coincide(graphql):
+    resultado = graphql(CONSULTA, extensions=extension("{ registros { total } }"))
+
+    assert codigos(resultado) == ["PERSISTED_QUERY_ERROR"]
+    assert resultado["errors"][0]["message"] == "provided sha does not match query"
+    assert persisted_query_store.get(query_hash(CONSULTA)) is None
+
+
+def test_version_no_soportada(graphql):
+    resultado = graphql(CONSULTA, extensions=extension(version=2))
+
+    assert codigos(resultado) == ["PERSISTED_QUERY_ERROR"]
+    assert resultado["errors"][0]["message"] == "PersistedQueryNotSupported"
+
+
+def test_allowlist(tmp_path):
+    otra = "query Otra { registro(id: 1) { success } } query { registros { total } }"
+    archivo = tmp_path / "persisted_queries.json"
+    archivo.write_text(json.dumps({query_hash(CONSULTA): CONSULTA, query_hash(otra): otra}))
+
+    store = PersistedQueryStore(maxsize=1, allowlist_path=str(archivo))
+    store.register(query_hash("{ a }"), "{ a }")
+    store.register(query_hash("{ b }"), "{ b }")
+
+    assert store.get(query_hash(CONSULTA)) == CONSULTA
+    assert store.get(query_hash("{ a }")) is None
+    assert store.operation_names == {"TotalRegistros", "Otra"}
+    assert store.stats()["allowlist"] == 2
+
+
+def test_allowlist_con_hash_incorrecto(tmp_path):
+    archivo = tmp_path / "persisted_queries.json"
+    archivo.write_text(json.dumps({"0" * 64: CONSULTA}))
+
+    with pytest.raises(ValueError, match="no coinciden"):
+        PersistedQueryStore(maxsize=10, allowlist_path=str(archivo))
+
+
+def test_estadisticas_en_health_y_metrics(client, graphql):
+    graphql(extensions=extension())
+    graphql(CONSULTA, extensions=extension())
+    graphql(extensions=extension())
+
+    cache = client.get("/health").json()["cache"]
+    assert (cache["apq"]["size"], cache["apq"]["hits"], cache["apq"]["misses"]) == (1, 1, 1)
+    assert cache["documentos"]["hits"] >= 1
+
+    metricas = client.get("/metrics").text
+    assert 'graphql_cache_lookups_total{cache="apq",result="hit"}' in metricas
+    assert 'graphql_cache_lookups_total{cache="document",result="hit"}' in metricas
@@ -0,0 +1,67 @@
+"""Estrategia `approximate` de CountProvider y su respaldo con el conteo cacheado."""
+from types import SimpleNamespace
+
+from sqlalchemy.dialects import mssql
+
+from app.core import database
+from app.models.registro import Registro
+from app.services.conteo import CountProvider
+
+
+class SesionMssql:
+    """Sesión SQLite real que se presenta como SQL Server; la DMV responde `dmv`."""
+
+    def __init__(self, db, dmv):
+        self.db = db
+        self.dmv = dmv
+        self.consultas_dmv = []
+        dialecto = mssql.dialect()
+        dialecto.default_schema_name = "ventas"
+        self.bind = SimpleNamespace(dialect=dialecto)
+
+    def get_bind(self):
+        return self.bind
+
+    def execute(self, sentencia, parametros=None):
+        if "dm_db_partition_stats" not in str(sentencia):
+            return self.db.execute(sentencia, parametros)
+        self.consultas_dmv.append(parametros)
+        if isinstance(self.dmv, Exception):
+            raise self.dmv
+        return SimpleNamespace(scalar=lambda: self.dmv)
+
+    def rollback(self):
+        self.db.rollback()
+
+
+def contar(dmv, veces=3):
+    provider = CountProvider(Registro, strategy="approximate", ttl=60)
+    with database.SessionLocal() as db:
+        sesion = SesionMssql(db, dmv)
+        resultados = [provider.count(sesion) for _ in range(veces)]
+    return resultados, sesion.consultas_dmv
+
+
+def test_aproximado_con_tabla_calificada():
+    resultados, consultas = contar(1234)
+
+    assert resultados == [(1234, False)] * 3
+    assert consultas[0] == {"tabla": "[ventas].[registros]"}
+
+
+def test_sin_permiso_no_se_reintenta(crear_registros):
+    crear_registros([(1, "Ana"), (2, "Luis")])
+
+    resultados, consultas = contar(PermissionError("VIEW DATABASE STATE permission denied"))
+
+    assert resultados == [(2, True), (2, False), (2, False)]
+    assert len(consultas) == 1
+
+
+def test_null_no_se_informa_como_cero(crear_registros):
+    crear_registros([(1, "Ana")])
+
+    resultados, consultas = contar(None)
+
+    assert resultados[0] == (1, True)
+    assert len(consultas) == 1
@@ -0,0 +1,129 @@
+"""Análisis estático del costo de las operaciones GraphQL y límites por operación."""
+import time
+
+import pytest
+from graphql import parse
+
+from app.core.config import settings
+from app.graphql import schema
+from app.graphql.cost import analyze_cost
+
+
+def costo(documento: str, operation_name=None, variables=None):
+    return analyze_cost(schema._schema, parse(documento), operation_name, variables)
+
+
+def costo_con_limites(documento: str, **limites):
+    return analyze_cost(schema._schema, parse(documento), **limites)
+
+
+def test_campo_escalar():
+    resultado = costo("{ registro(id: 1) { success registro { id } } }")
+
+    # registro + success + registro + id
+    assert (resultado.cost, resultado.depth, resultado.aliases) == (4, 3, 0)
+
+
+def test_listas_multiplican_por_el_tamano_de_pagina():
+    resultado = costo("{ registros(limit: 10) { total registros { id nombre } } }")
+
+    # registros + total + registros(10 x (id + nombre))
+    assert resultado.cost == 1 + 1 + 1 + 10 * 2
+
+
+def test_tamano_de_pagina_por_variable_y_por_defecto():
+    por_variable = costo(
+        "query ($n: Int) { registrosConnection(first: $n) { edges { node { id } } } }", variables={"n": 5}
+    )
+    por_defecto = costo("{ registrosConnection { edges { node { id } } } }")
+
+    assert por_variable.cost == 1 + 1 + 5 * 2
+    assert por_defecto.cost == 1 + 1 + settings.DEFAULT_LIMIT * 2
+
+
+def test_tamano_de_pagina_ajustado_a_max_limit():
+    resultado = costo("{ registros(limit: 1000000) { registros { id } } }")
+
+    assert resultado.cost == 1 + 1 + settings.MAX_LIMIT
+
+
+def test_fragmentos_alias_e_introspeccion():
+    resultado = costo(
+        "query Panel { __typename a: registro(id: 1) { ...Campos } b: registro(id: 2) { ...Campos } }"
+        " fragment Campos on RegistroResponse { success }"
+    )
+
+    assert (resultado.cost, resultado.aliases) == (4, 2)
+
+
+def test_operacion_por_nombre():
+    documento = "query A { registro(id: 1) { success } } query B { registros(limit: 3) { registros { id } } }"
+
+    assert costo(documento, "A").cost == 2
+    assert costo(documento, "B").cost == 1 + 1 + 3
+
+
+@pytest.mark.parametrize("limite, valor, documento, codigo", [
+    ("GRAPHQL_MAX_COST", 10, "{ registros(limit: 50) { registros { id } } }", "QUERY_TOO_COMPLEX"),
+    ("GRAPHQL_MAX_DEPTH", 2, "{ registro(id: 1) { registro { id } } }", "QUERY_TOO_DEEP"),
+    ("GRAPHQL_MAX_ALIASES", 1, "{ a: registro(id: 1) { success } b: registro(id: 2) { success } }", "TOO_MANY_ALIASES"),
+])
+def test_operaciones_que_superan_los_limites(monkeypatch, graphql, limite, valor, documento, codigo):
+    monkeypatch.setattr(settings, limite, valor)
+
+    resultado = graphql(documento)
+
+    assert resultado["data"] is None
+    assert [e["extensions"]["code"] for e in resultado["errors"]] == [codigo]
+
+
+def test_costo_en_extensions(graphql):
+    resultado = graphql("{ registros(limit: 10) { registros { id } } }")
+
+    assert resultado["extensions"]["cost"] == {
+        "requested": 12, "depth": 3, "aliases": 0, "maximum": settings.GRAPHQL_MAX_COST
+    }
+
+
+def fragmentos_duplicados(niveles: int) -> str:
+    """Cada fragmento usa dos veces el siguiente: sin deduplicar, 2^niveles expansiones."""
+    fragmentos = "".join(
+        f" fragment F{i} on Query {{ ...F{i + 1} ...F{i + 1} }}" for i in range(niveles)
+    )
+    return f"{{ ...F0 }}{fragmentos} fragment F{niveles} on Query {{ registro(id: 1) {{ success }} }}"
+
+
+def test_fragmentos_anidados_duplicados_se_expanden_una_vez():
+    inicio = time.process_time()
+    resultado = costo(fragmentos_duplicados(40))
+
+    assert time.process_time() - inicio < 1
+    # Como en la ejecución, el campo final se recoge una sola vez
+    assert (resultado.cost, resultado.depth) == (2, 2)
+
+
+def test_fragmentos_duplicados_en_campos_distintos():
+    """Los fragmentos se deduplican por conjunto de selección, no en todo el documento."""
+    resultado = costo(
+        "{ a: registro(id: 1) { ...C } b: registro(id: 2) { ...C ...C } } fragment C on RegistroResponse { success }"
+    )
+
+    assert resultado.cost == 4
+
+
+def test_analisis_detenido_al_superar_un_limite():
+    documento = "{ " + " ".join(f"a{i}: registro(id: {i}) {{ success }}" for i in range(1000)) + " }"
+
+    por_costo = costo_con_limites(documento, max_cost=50)
+    por_alias = costo_con_limites(documento, max_aliases=10)
+
+    assert por_costo.cost == 51
+    assert por_alias.aliases == 11
+    assert por_alias.cost < costo(documento).cost
+
+
+def test_fragmentos_duplicados_en_graphql(graphql):
+    resultado = graphql(fragmentos_duplicados(30))
+
+    assert "errors" not in resultado
+    assert resultado["extensions"]["cost"]["requested"] == 2
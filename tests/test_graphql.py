@@ -0,0 +1,96 @@
+"""Operaciones GraphQL de registros con DB_ASYNC=False y DB_ASYNC=True."""
+from app.core import database
+
+
+def test_modo_de_acceso(db_async, monkeypatch, graphql, crear_registros):
+    """Con DB_ASYNC=True los resolvers usan AsyncSession; sin él, sesiones síncronas."""
+    crear_registros([(1, "Ana")])
+    sesiones = []
+    original = database._run_with_session
+
+    def espiar(fn, *args, **kwargs):
+        sesiones.append("sync")
+        return original(fn, *args, **kwargs)
+
+    monkeypatch.setattr(database, "_run_with_session", espiar)
+
+    resultado = graphql("{ registros { success total } }")
+
+    assert resultado["data"]["registros"] == {"success": True, "total": 1}
+    assert sesiones == ([] if db_async else ["sync"])
+
+
+def test_listado_y_busqueda_por_id(db_async, graphql, crear_registros):
+    ana, luis = crear_registros([(10, "Ana"), (20, "Luis")])
+
+    resultado = graphql(
+        "query ($id: Int!) {"
+        "  registros(skip: 0, limit: 10) { success total totalIsExact registros { id documento nombre } }"
+        "  registro(id: $id) { success registro { id nombre } }"
+        "  inexistente: registro(id: 0) { success message }"
+        "}",
+        {"id": luis}
+    )
+
+    datos = resultado["data"]
+    assert "errors" not in resultado
+    assert datos["registros"]["success"] is True
+    assert datos["registros"]["total"] == 2
+    assert datos["registros"]["totalIsExact"] is True
+    assert datos["registros"]["registros"] == [
+        {"id": ana, "documento": 10, "nombre": "Ana"},
+        {"id": luis, "documento": 20, "nombre": "Luis"},
+    ]
+    assert datos["registro"] == {"success": True, "registro": {"id": luis, "nombre": "Luis"}}
+    assert datos["inexistente"] == {"success": False, "message": "Registro no encontrado"}
+
+
+def test_alias_con_columnas_distintas(db_async, graphql, crear_registros):
+    """Los alias de `registro` del mismo tick comparten el lote aunque pidan columnas distintas."""
+    ana, luis = crear_registros([(10, "Ana"), (20, "Luis")])
+
+    resultado = graphql(
+        "query ($a: Int!, $b: Int!) {"
+        "  a: registro(id: $a) { registro { id nombre } }"
+        "  b: registro(id: $b) { registro { id documento } }"
+        "  c: registro(id: $a) { registro { documento nombre } }"
+        "}",
+        {"a": ana, "b": luis}
+    )
+
+    datos = resultado["data"]
+    assert datos["a"]["registro"] == {"id": ana, "nombre": "Ana"}
+    assert datos["b"]["registro"] == {"id": luis, "documento": 20}
+    assert datos["c"]["registro"] == {"documento": 10, "nombre": "Ana"}
+
+
+def test_crear_actualizar_y_eliminar(db_async, graphql):
+    creado = graphql(
+        'mutation { crearRegistro(registroInput: {documento: 30, nombre: "Eva"}) {'
+        "  success registro { id documento nombre } } }"
+    )["data"]["crearRegistro"]
+    assert creado["success"] is True
+    registro_id = creado["registro"]["id"]
+
+    actualizado = graphql(
+        "mutation ($id: Int!) { actualizarRegistro(id: $id, registroInput: {nombre: \"Eva María\"}) {"
+        "  success registro { nombre } } }",
+        {"id": registro_id}
+    )["data"]["actualizarRegistro"]
+    assert actualizado == {"success": True, "registro": {"nombre": "Eva María"}}
+
+    eliminado = graphql(
+        "mutation ($id: Int!) { eliminarRegistro(id: $id) { success } }", {"id": registro_id}
+    )["data"]["eliminarRegistro"]
+    assert eliminado == {"success": True}
+    assert graphql("{ registros { total } }")["data"]["registros"]["total"] == 0
+
+
+def test_documento_duplicado(db_async, graphql, crear_registros):
+    crear_registros([(40, "Ana")])
+
+    resultado = graphql(
+        'mutation { crearRegistro(registroInput: {documento: 40, nombre: "Otra"}) { success message } }'
+    )["data"]["crearRegistro"]
+
+    assert resultado["success"] is False
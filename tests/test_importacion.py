@@ -0,0 +1,83 @@
+"""Exportación e importación de registros en streaming."""
+import json
+
+import pytest
+from sqlalchemy import delete
+
+from app.core import database
+from app.core.security import get_current_active_user, get_current_admin_user
+from app.main import app
+from app.models.registro import Registro
+from app.routers import registros as router_registros
+
+URL = "/api/v1/registros"
+
+
+@pytest.fixture(autouse=True)
+def admin(monkeypatch):
+    usuario = object()
+    monkeypatch.setitem(app.dependency_overrides, get_current_active_user, lambda: usuario)
+    monkeypatch.setitem(app.dependency_overrides, get_current_admin_user, lambda: usuario)
+
+
+def trozos(contenido: bytes, tamano: int = 7):
+    """Cuerpo enviado en trozos pequeños, como llega por la red."""
+    for i in range(0, len(contenido), tamano):
+        yield contenido[i:i + tamano]
+
+
+def importar(client, cuerpo: str, formato: str = "csv", **params):
+    return client.post(
+        f"{URL}/import", params={"format": formato, **params}, content=trozos(cuerpo.encode())
+    )
+
+
+def nombres(client):
+    texto = client.get(f"{URL}/export", params={"format": "ndjson"}).text
+    return [json.loads(linea)["nombre"] for linea in texto.splitlines()]
+
+
+def test_ida_y_vuelta_csv_con_comillas_y_saltos_de_linea(client, crear_registros):
+    originales = ['Ana "la" Pérez', "Línea\nsegunda, con coma", "Tercero\r\nx"]
+    crear_registros(list(enumerate(originales, start=1)))
+    exportado = client.get(f"{URL}/export", params={"format": "csv"}).text
+    with database.SessionLocal() as db:
+        db.execute(delete(Registro))
+        db.commit()
+
+    resumen = importar(client, exportado).json()
+
+    assert (resumen["insertadas"], resumen["rechazadas"]) == (3, 0)
+    assert nombres(client) == originales
+
+
+def test_comilla_dentro_de_un_campo_sin_comillas(client):
+    resumen = importar(client, '1,O"Brien\n2,Ana\n3,"Luis ""el"" Gómez"\n').json()
+
+    assert (resumen["insertadas"], resumen["rechazadas"]) == (3, 0)
+    assert nombres(client) == ['O"Brien', "Ana", 'Luis "el" Gómez']
+
+
+def test_comillas_sin_cerrar_no_acumulan_el_resto_del_cuerpo(client, monkeypatch):
+    monkeypatch.setattr(router_registros, "MAX_CARACTERES_REGISTRO_CSV", 100)
+    lineas = ["documento,nombre", '1,"sin cerrar'] + [f"{n},Nombre {n}" for n in range(2, 40)]
+
+    resumen = importar(client, "\n".join(lineas) + "\n").json()
+
+    assert resumen["rechazos"][0]["linea"] == 2
+    assert "comillas sin cerrar" in resumen["rechazos"][0]["error"]
+    # Solo se pierden las líneas del registro descartado; el resto se importa
+    assert resumen["insertadas"] > 25
+
+
+def test_progreso_en_ndjson(client, monkeypatch):
+    monkeypatch.setattr(router_registros.settings, "IMPORT_BATCH_SIZE", 2)
+    cuerpo = "".join(json.dumps({"documento": n, "nombre": f"N{n}"}) + "\n" for n in range(1, 6)) + "nope\n"
+
+    respuesta = importar(client, cuerpo, formato="ndjson", progress="true")
+
+    assert respuesta.headers["content-type"].startswith("application/x-ndjson")
+    eventos = [json.loads(linea) for linea in respuesta.text.splitlines()]
+    assert [e["progreso"]["insertadas"] for e in eventos[:-1]] == [2, 4, 5]
+    assert eventos[-1]["resumen"]["insertadas"] == 5
+    assert eventos[-1]["resumen"]["rechazos"][0]["linea"] == 6
@@ -0,0 +1,21 @@
+"""Migraciones del esquema y comprobación de pendientes para el despliegue."""
+from sqlalchemy import create_engine, text
+
+from app.core.migrations import pendientes, upgrade
+
+
+def test_pendientes_y_upgrade(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migraciones.db'}")
+
+    assert sorted(pendientes(engine)) == ["tabla registros", "tabla usuarios"]
+
+    upgrade(engine)
+    assert pendientes(engine) == []
+
+    # Base de datos creada antes del índice único de documento
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX ix_registros_documento"))
+    assert pendientes(engine) == ["0001_indice_unico_documento"]
+
+    upgrade(engine)
+    assert pendientes(engine) == []
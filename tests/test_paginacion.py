@@ -0,0 +1,80 @@
+"""Paginación por cursor de `registrosConnection`."""
+import pytest
+
+from app.graphql.pagination import decode_cursor, encode_cursor
+
+PAGINA = """
+query ($first: Int, $after: String) {
+    registrosConnection(first: $first, after: $after) {
+        success
+        message
+        edges { cursor node { id nombre } }
+        pageInfo { hasNextPage hasPreviousPage startCursor endCursor }
+    }
+}
+"""
+
+
+def test_cursor_ida_y_vuelta():
+    assert decode_cursor(encode_cursor(123)) == 123
+
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "no-es-base64!",
+    "b3RybzoxMA==",  # "otro:10": prefijo distinto
+    "cmVnaXN0cm86YQ==",  # "registro:a": ID no numérico
+])
+def test_cursor_invalido(cursor):
+    with pytest.raises(ValueError, match="Cursor inválido"):
+        decode_cursor(cursor)
+
+
+def test_recorre_todas_las_paginas(db_async, graphql, crear_registros):
+    ids = crear_registros([(documento, f"Registro {documento}") for documento in range(1, 8)])
+
+    vistos, after, paginas = [], None, 0
+    while True:
+        conexion = graphql(PAGINA, {"first": 3, "after": after})["data"]["registrosConnection"]
+        assert conexion["success"] is True
+        pagina = conexion["pageInfo"]
+        assert pagina["hasPreviousPage"] is (after is not None)
+        assert pagina["startCursor"] == conexion["edges"][0]["cursor"]
+        assert pagina["endCursor"] == conexion["edges"][-1]["cursor"]
+        vistos += [edge["node"]["id"] for edge in conexion["edges"]]
+        paginas += 1
+        if not pagina["hasNextPage"]:
+            break
+        after = pagina["endCursor"]
+
+    assert paginas == 3
+    assert vistos == ids
+
+
+def test_pagina_despues_del_ultimo(db_async, graphql, crear_registros):
+    ultimo = crear_registros([(1, "Ana"), (2, "Luis")])[-1]
+
+    conexion = graphql(PAGINA, {"first": 5, "after": encode_cursor(ultimo)})["data"]["registrosConnection"]
+
+    assert conexion["success"] is True
+    assert conexion["edges"] == []
+    assert conexion["pageInfo"] == {
+        "hasNextPage": False, "hasPreviousPage": True, "startCursor": None, "endCursor": None
+    }
+
+
+def test_pagina_exacta_sin_siguiente(db_async, graphql, crear_registros):
+    crear_registros([(1, "Ana"), (2, "Luis")])
+
+    conexion = graphql(PAGINA, {"first": 2})["data"]["registrosConnection"]
+
+    assert len(conexion["edges"]) == 2
+    assert conexion["pageInfo"]["hasNextPage"] is False
+
+
+def test_cursor_invalido_en_la_consulta(graphql):
+    conexion = graphql(PAGINA, {"first": 2, "after": "no-es-un-cursor"})["data"]["registrosConnection"]
+
+    assert conexion["success"] is False
+    assert conexion["message"] == "Cursor inválido"
+    assert conexion["edges"] == []
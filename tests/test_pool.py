@@ -0,0 +1,70 @@
+"""Precalentamiento y keepalive del pool de conexiones."""
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.pool import (
+    TimedAsyncAdaptedQueuePool, TimedQueuePool, instrument_pool, keepalive, keepalive_async, prewarm, prewarm_async
+)
+
+
+def maximo_en_uso(pool):
+    """Registra el máximo de conexiones en uso a la vez durante los checkouts."""
+    maximo = [0]
+    event.listen(pool, "checkout", lambda *args: maximo.__setitem__(0, max(maximo[0], pool.checkedout())))
+    return maximo
+
+
+@pytest.mark.parametrize("pre_ping", [True, False])
+def test_keepalive_de_una_en_una_y_fuera_de_las_estadisticas(tmp_path, pre_ping):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}", poolclass=TimedQueuePool,
+        pool_size=3, max_overflow=5, pool_pre_ping=pre_ping
+    )
+    stats = instrument_pool(engine.pool)
+    assert prewarm(engine, 3) == 3
+    antes = stats.snapshot(engine.pool)
+    maximo = maximo_en_uso(engine.pool)
+
+    assert keepalive(engine) == 3
+
+    despues = stats.snapshot(engine.pool)
+    assert maximo[0] == 1
+    assert despues["keepalive_pings"] == 3
+    for clave in ("checkouts", "checkins", "connects", "wait_max_ms"):
+        assert despues[clave] == antes[clave]
+    assert (despues["idle"], despues["overflow"]) == (3, 0)
+
+
+def test_keepalive_invalida_las_conexiones_caidas(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}", poolclass=TimedQueuePool, pool_size=2, pool_pre_ping=False
+    )
+    stats = instrument_pool(engine.pool)
+    prewarm(engine, 2)
+    # Conexiones cortadas por el servidor mientras estaban inactivas
+    for registro in list(engine.pool._pool.queue):
+        registro.dbapi_connection.close()
+
+    assert keepalive(engine) == 0
+    assert stats.invalidations == 2
+
+
+def test_keepalive_async(tmp_path):
+    async def probar():
+        engine = create_async_engine(
+            f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}", poolclass=TimedAsyncAdaptedQueuePool, pool_size=3
+        )
+        stats = instrument_pool(engine.sync_engine.pool)
+        try:
+            assert await prewarm_async(engine, 3) == 3
+            checkouts = stats.checkouts
+            assert await keepalive_async(engine) == 3
+            assert stats.checkouts == checkouts
+            assert stats.keepalive_pings == 3
+        finally:
+            await engine.dispose()
+
+    asyncio.run(probar())
@@ -0,0 +1,92 @@
+"""Storage SQLite de `limits` compartido entre workers."""
+import pytest
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import SlidingWindowCounterRateLimiter
+
+from app.core import rate_limit
+from app.core.rate_limit import SQLiteStorage
+
+
+@pytest.fixture
+def uri(tmp_path):
+    return f"sqlite:///{tmp_path / 'limites.db'}"
+
+
+def test_uri_registrada_en_limits(uri):
+    assert isinstance(storage_from_string(uri), SQLiteStorage)
+
+
+def test_archivo_abierto_en_el_primer_uso(tmp_path, uri):
+    storage = SQLiteStorage(uri)
+    assert not (tmp_path / "limites.db").exists()
+
+    assert storage.check()
+    assert (tmp_path / "limites.db").exists()
+
+
+def test_incr_get_y_expiracion(monkeypatch, uri):
+    ahora = 1000.0
+    monkeypatch.setattr(rate_limit.time, "time", lambda: ahora)
+    storage = SQLiteStorage(uri)
+
+    assert storage.incr("clave", 10) == 1
+    assert storage.incr("clave", 10, amount=4) == 5
+    assert storage.get("clave") == 5
+    assert storage.get_expiry("clave") == 1010.0
+    assert storage.decr("clave", 2) == 3
+
+    ahora = 1010.0
+    assert storage.get("clave") == 0
+    assert storage.incr("clave", 10) == 1
+    assert storage.get_expiry("clave") == 1020.0
+
+
+def test_contadores_compartidos_entre_instancias(uri):
+    """Dos storages sobre el mismo archivo (como dos workers) ven los mismos contadores."""
+    limite = parse("5/minute")
+    worker_a = SlidingWindowCounterRateLimiter(SQLiteStorage(uri))
+    worker_b = SlidingWindowCounterRateLimiter(SQLiteStorage(uri))
+
+    assert worker_a.hit(limite, "cliente", cost=3)
+    assert worker_b.hit(limite, "cliente", cost=2)
+    assert not worker_a.hit(limite, "cliente")
+    assert not worker_b.hit(limite, "cliente")
+    assert worker_b.hit(limite, "otro")
+    assert worker_a.get_window_stats(limite, "cliente").remaining == 0
+
+
+def test_costo_mayor_que_el_limite(uri):
+    limitador = SlidingWindowCounterRateLimiter(SQLiteStorage(uri))
+
+    assert not limitador.hit(parse("5/minute"), "cliente", cost=6)
+
+
+def test_tabla_llena_admite_clientes_nuevos_sin_borrar_contadores(uri):
+    limite = parse("3/minute")
+    limitador = SlidingWindowCounterRateLimiter(SQLiteStorage(uri, max_keys=2))
+
+    assert limitador.hit(limite, "a")
+    assert limitador.hit(limite, "b")
+    limitador.storage._ultima_purga = 0.0  # fuerza la comprobación de la tabla
+
+    # Con la tabla llena los clientes nuevos pasan sin contador (fail open)
+    assert all(limitador.hit(limite, "c") for _ in range(5))
+    assert limitador.storage.llena
+    assert limitador.get_window_stats(limite, "c").remaining == 3
+    # Los existentes conservan su cuenta y siguen limitados
+    assert limitador.hit(limite, "a", cost=2)
+    assert not limitador.hit(limite, "a")
+
+
+def test_clear_y_reset(uri):
+    limite = parse("2/minute")
+    limitador = SlidingWindowCounterRateLimiter(SQLiteStorage(uri))
+
+    assert limitador.hit(limite, "cliente", cost=2)
+    assert not limitador.hit(limite, "cliente")
+    limitador.clear(limite, "cliente")
+    assert limitador.hit(limite, "cliente", cost=2)
+
+    assert limitador.storage.reset() >= 1
+    assert limitador.hit(limite, "cliente", cost=2)